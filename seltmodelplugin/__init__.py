@@ -1,4 +1,7 @@
-# ruff: noqa: F401
+"""SELT modeling language plugin for Gaphor.
 
-import seltmodelplugin.iconname
-import seltmodelplugin.modelinglanguage
+Gaphor loads the modeling language, services and property pages through
+their entry points, so nothing is imported here: importing a single module,
+like the command line exporter, does not pull in the diagram items and
+their imaging dependencies.
+"""
@@ -0,0 +1,59 @@
+"""Run blocking work off the GTK main thread.
+
+Work is submitted to named thread pools. Results are handed back on the
+GLib main loop, which is the only place where the model and the canvas may
+be touched.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from gi.repository import GLib
+
+logger = logging.getLogger(__name__)
+
+_executors: dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def executor(name, max_workers=4):
+    """Return the thread pool called ``name``, creating it on first use."""
+    with _lock:
+        pool = _executors.get(name)
+        if pool is None:
+            pool = _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"selt-{name}"
+            )
+        return pool
+
+
+def call_in_main_loop(func, *args):
+    """Schedule ``func(*args)`` on the GLib main loop."""
+
+    def idle():
+        try:
+            func(*args)
+        except Exception:
+            logger.exception(f"Error in main loop callback {func}")
+        return GLib.SOURCE_REMOVE
+
+    GLib.idle_add(idle)
+
+
+def submit(name, func, *args, callback=None):
+    """Run ``func(*args)`` on pool ``name``.
+
+    ``callback`` is called with the finished future on the main loop.
+    """
+    future = executor(name).submit(func, *args)
+    if callback:
+        future.add_done_callback(lambda f: call_in_main_loop(callback, f))
+    return future
+
+
+def shutdown():
+    with _lock:
+        for pool in _executors.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
@@ -42,7 +42,10 @@ class C4Dependency(Dependency):
 
 
 class seltFile(Package):
+    fileHash: _attribute[str] = _attribute("fileHash", str)
+    fileMtimeNs: _attribute[int] = _attribute("fileMtimeNs", int)
     filePath: _attribute[str] = _attribute("filePath", str, default="")
+    fileSize: _attribute[int] = _attribute("fileSize", int)
     lastModified: _attribute[int] = _attribute("lastModified", int)
     modified: _attribute[int] = _attribute("modified", int, default=False)
 
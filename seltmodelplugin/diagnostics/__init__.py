@@ -0,0 +1,4 @@
+# ruff: noqa: F401
+
+from seltmodelplugin.diagnostics.diagnosticsservice import DiagnosticsService
+from seltmodelplugin.diagnostics.recorder import Probe, recorder
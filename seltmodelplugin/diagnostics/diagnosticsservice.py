@@ -0,0 +1,165 @@
+import json
+import logging
+import platform
+import time
+from pathlib import Path
+
+from gaphor.abc import ActionProvider, Service
+from gaphor.core import action, gettext
+from gaphor.ui.filedialog import save_file_dialog
+from seltmodelplugin.diagnostics.recorder import Probe, recorder
+
+logger = logging.getLogger(__name__)
+
+SELT_FILE = "seltmodelplugin.diagramitems.seltFile"
+OBSERVER = "seltmodelplugin.observer.updatefilesmetadata"
+BACKEND = "seltmodelplugin.tableexport.backend"
+PROPERTY_PAGES = "seltmodelplugin.propertypages"
+
+
+def _is_hit(result):
+    return result is not None
+
+
+PROBES = [
+    # Items bind draw_content when created, so the whole draw is timed
+    Probe("seltfile.draw", SELT_FILE, "seltFileItem.draw"),
+    Probe("seltfile.decode_surface", SELT_FILE, "seltFileItem._decode_surface"),
+    Probe("seltfile.decode_tile", SELT_FILE, "seltFileItem._decode_tile"),
+    Probe("seltfile.decode_level", SELT_FILE, "decode_level"),
+    Probe("seltfile.convert", SELT_FILE, "seltFileItem._from_pil"),
+    Probe(
+        "thumbnails.load",
+        "seltmodelplugin.imaging.diskcache",
+        "ThumbnailCache.load",
+        hit=_is_hit,
+    ),
+    Probe("observer.scan", OBSERVER, "ObserverService.scan"),
+    Probe("observer.apply_results", OBSERVER, "ObserverService.apply_results"),
+    Probe("observer.hash_file", "seltmodelplugin.observer.hashcache", "hash_file"),
+    Probe("tableexport.encode_element", BACKEND, "encode_json"),
+    Probe("tableexport.write_json", BACKEND, "write_model_json"),
+    Probe("tableexport.write_table", BACKEND, "write_model_table"),
+    Probe(
+        "tableexport.export_backend",
+        "seltmodelplugin.tableexport.tableexport",
+        "TableExporter._export_backend",
+    ),
+    Probe("propertypages.builder", PROPERTY_PAGES, "new_builder"),
+    Probe(
+        "propertypages.description",
+        PROPERTY_PAGES,
+        "DescriptionPropertyPage.construct",
+    ),
+    Probe("propertypages.file", PROPERTY_PAGES, "FilePropertyPage.construct"),
+]
+
+
+def _cache_report(cache):
+    lookups = cache.hits + cache.misses
+    report = {
+        "entries": len(cache),
+        "hits": cache.hits,
+        "misses": cache.misses,
+        "hit_rate": cache.hits / lookups if lookups else 0.0,
+    }
+    if hasattr(cache, "nbytes"):
+        report["bytes"] = cache.nbytes
+        report["max_bytes"] = cache.max_bytes
+    return report
+
+
+class DiagnosticsService(Service, ActionProvider):
+    """Time the hot paths of the plugin and report where time goes.
+
+    Timing is off by default; while it is off, no code of the plugin is
+    instrumented. The report holds call counts, cumulative, mean and 95th
+    percentile times per probe, and the state of the caches.
+    """
+
+    def __init__(self, tools_menu=None, main_window=None, tableexporter=None):
+        self.tools_menu = tools_menu
+        self.main_window = main_window
+        self.tableexporter = tableexporter
+        self.enabled = False
+        self.started = None
+        if tools_menu:
+            tools_menu.add_actions(self)
+
+    def shutdown(self):
+        self.disable()
+        if self.tools_menu:
+            self.tools_menu.remove_actions(self)
+
+    @action(
+        name="diagnostics-enable",
+        label=gettext("Record timings"),
+        tooltip=gettext("Time image decoding, file checks and exports"),
+        state=False,
+    )
+    def enable_action(self, active):
+        if active:
+            self.enable()
+        else:
+            self.disable()
+
+    @action(
+        name="diagnostics-dump",
+        label=gettext("Save diagnostics report"),
+        tooltip=gettext("Save recorded timings and cache statistics as json"),
+    )
+    def dump_action(self):
+        save_file_dialog(
+            gettext("Save diagnostics report"),
+            Path("diagnostics.json").absolute(),
+            self.dump,
+            parent=self.main_window.window if self.main_window else None,
+            filters=[(gettext("All JSON Files"), "*.json", "application/json")],
+        )
+
+    def enable(self):
+        if self.enabled:
+            return
+        recorder.reset()
+        for probe in PROBES:
+            try:
+                probe.install()
+            except (ImportError, AttributeError) as e:
+                logger.warning(f"Could not instrument {probe.attribute}: {e}")
+        self.enabled = True
+        self.started = time.time()
+
+    def disable(self):
+        for probe in PROBES:
+            probe.uninstall()
+        self.enabled = False
+
+    def report(self):
+        from seltmodelplugin.imaging import surface_cache
+        from seltmodelplugin.imaging.tiles import tile_cache
+
+        caches = {
+            "surfaces": _cache_report(surface_cache),
+            "tiles": _cache_report(tile_cache),
+        }
+        fragments = self.tableexporter and self.tableexporter.fragments
+        if fragments is not None:
+            caches["export_fragments"] = _cache_report(fragments)
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "recording": self.enabled,
+            "recording_since": time.strftime(
+                "%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)
+            )
+            if self.started
+            else None,
+            "python": platform.python_version(),
+            "timers": recorder.report(),
+            "caches": caches,
+        }
+
+    def dump(self, file_path):
+        """Write the report to ``file_path``."""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=4)
+        logger.info(f"Diagnostics written to '{file_path}'")
@@ -0,0 +1,137 @@
+"""Timers and counters for the hot paths of the plugin.
+
+Functions are instrumented by ``Probe``s, which replace the attribute
+holding the function by a timing wrapper while diagnostics are enabled and
+put the original back when disabled. Disabled probes cost nothing.
+"""
+
+import functools
+import importlib
+import math
+import threading
+import time
+from collections import deque
+
+# Durations kept per timer, for percentiles
+MAX_SAMPLES = 2048
+
+
+class Timer:
+    """Call count and durations of one probe."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.hits = 0
+        self.samples: deque[float] = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, seconds, hit=False):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.hits += hit
+        self.samples.append(seconds)
+
+    def report(self, with_hits=False):
+        samples = sorted(self.samples)
+        p95 = samples[math.ceil(0.95 * len(samples)) - 1] if samples else 0.0
+        report = {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total * 1000 / self.count if self.count else 0.0,
+            "p95_ms": p95 * 1000,
+            "max_ms": self.max * 1000,
+        }
+        if with_hits:
+            report["hits"] = self.hits
+            report["hit_rate"] = self.hits / self.count if self.count else 0.0
+        return report
+
+
+class Recorder:
+    """Collects the timers of all probes. Thread safe: images are decoded
+    on a thread pool."""
+
+    def __init__(self):
+        self._timers: dict[str, Timer] = {}
+        self._hit_timers: set[str] = set()
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, hit=None):
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                timer = self._timers[name] = Timer()
+            if hit is not None:
+                self._hit_timers.add(name)
+            timer.add(seconds, bool(hit))
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._hit_timers.clear()
+
+    def report(self):
+        with self._lock:
+            return {
+                name: timer.report(name in self._hit_timers)
+                for name, timer in sorted(self._timers.items())
+            }
+
+
+recorder = Recorder()
+
+
+class Probe:
+    """Time every call of ``module:attribute``.
+
+    ``attribute`` may be a dotted path, e.g. ``Class.method``. With ``hit``,
+    a predicate on the return value, calls are also counted as cache hits.
+    """
+
+    def __init__(self, name, module, attribute, hit=None):
+        self.name = name
+        self.module = module
+        self.attribute = attribute
+        self.hit = hit
+        self._original = None
+        self._inherited = False
+
+    def _owner(self):
+        owner = importlib.import_module(self.module)
+        *path, attribute = self.attribute.split(".")
+        for part in path:
+            owner = getattr(owner, part)
+        return owner, attribute
+
+    def install(self, recorder=recorder):
+        if self._original is not None:
+            return
+        owner, attribute = self._owner()
+        # An inherited method is wrapped on the owner and removed again
+        # on uninstall
+        self._inherited = attribute not in vars(owner)
+        original = getattr(owner, attribute)
+        name, hit = self.name, self.hit
+        perf_counter = time.perf_counter
+
+        @functools.wraps(original)
+        def probe(*args, **kwargs):
+            start = perf_counter()
+            result = original(*args, **kwargs)
+            recorder.add(name, perf_counter() - start, hit(result) if hit else None)
+            return result
+
+        setattr(owner, attribute, probe)
+        self._original = original
+
+    def uninstall(self):
+        if self._original is None:
+            return
+        owner, attribute = self._owner()
+        if self._inherited:
+            delattr(owner, attribute)
+        else:
+            setattr(owner, attribute, self._original)
+        self._original = None
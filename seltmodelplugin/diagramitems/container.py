@@ -1,23 +1,35 @@
 from gaphor import UML
 from seltmodelplugin import c4model
 from gaphor.diagram.presentation import ElementPresentation, Named, text_name
-from gaphor.diagram.shapes import Box, CssNode, Text, draw_border
+from gaphor.diagram.shapes import CssNode, draw_border
 from gaphor.diagram.support import represents
 from gaphor.UML.compartments import text_stereotypes
+from seltmodelplugin.diagramitems.shapes import CachedText, DetailBox
+from seltmodelplugin.spatial import SpatialItem
 
 
 @represents(c4model.C4Container)
-class C4ContainerItem(Named, ElementPresentation):
+class C4ContainerItem(SpatialItem, Named, ElementPresentation):
     def __init__(self, diagram, id=None):
         super().__init__(diagram, id)
+        # The subject the shape was built for, and whether it shows the
+        # description, which only containers without children do
+        self._shape_key = None
 
         self.watch("subject.name")
         self.watch("subject.appliedStereotype.classifier.name")
 
+        self.watch("subject", self.update_shapes)
         self.watch("children", self.update_shapes)
 
     def update_shapes(self, event=None):
-        self.shape = Box(
+        shows_description = not self.children
+        shape_key = (self.subject, shows_description)
+        if self._shape and shape_key == self._shape_key:
+            return
+        self._shape_key = shape_key
+
+        self.shape = DetailBox(
             text_stereotypes(
                 self,
                 lambda: [self.diagram.gettext("profile")]
@@ -28,21 +40,21 @@ class C4ContainerItem(Named, ElementPresentation):
             CssNode(
                 "technology",
                 self.subject,
-                Text(
+                CachedText(
                     text=lambda: self.subject.technology
                     and f"[{self.subject.technology}]"
                 ),
             ),
             *(
-                ()
-                if self.children
-                else (
+                (
                     CssNode(
                         "description",
                         self.subject,
-                        Text(text=lambda: self.subject.description or ""),
+                        CachedText(text=lambda: self.subject.description or ""),
                     ),
                 )
+                if shows_description
+                else ()
             ),
             draw=draw_border,
         )
@@ -1,8 +1,12 @@
+from gaphas.segment import Segment
+
 from seltmodelplugin import c4model
 from gaphor.diagram.presentation import LinePresentation, Named, text_name
 from gaphor.diagram.shapes import Box, CssNode, Text, draw_arrow_head
 from gaphor.diagram.support import represents
 from gaphor.UML.compartments import text_stereotypes
+from seltmodelplugin.spatial import diagram_index, route_orthogonal
+from seltmodelplugin.spatial.routing import MARGIN
 
 
 @represents(
@@ -31,6 +35,74 @@ class C4DependencyItem(Named, LinePresentation[c4model.C4Dependency]):
         self.watch("subject.appliedStereotype.classifier.name")
 
         self.draw_head = draw_arrow_head
+        self._route_key = None
+
+    def update(self, context):
+        self.route()
+
+    def route(self):
+        """Lay out an orthogonal line around the items between its ends.
+
+        Lines are only routed when connected to SELT items at both ends,
+        and again only when one of those, or an item in the way of the
+        route, has moved or was resized.
+        """
+        index = diagram_index(self.diagram)
+        head = self._connections.get_connection(self.head)
+        tail = self._connections.get_connection(self.tail)
+        if not (
+            self.orthogonal
+            and head
+            and tail
+            and head.connected in index
+            and tail.connected in index
+        ):
+            self._route_key = None
+            index.remove_route(self)
+            return
+
+        key = (
+            index.bounds(head.connected),
+            index.bounds(tail.connected),
+            self.horizontal,
+        )
+        if key == self._route_key and not index.is_stale(self):
+            return
+        self._route_key = key
+
+        i2c = self.matrix_i2c
+        points = route_orthogonal(
+            index,
+            i2c.transform_point(*self.head.pos),
+            i2c.transform_point(*self.tail.pos),
+            self.horizontal,
+            exclude=(head.connected, tail.connected),
+        )
+
+        segment = Segment(self, self.diagram)
+        while len(self._handles) < len(points):
+            segment.split_segment(0)
+        while len(self._handles) > len(points):
+            segment.merge_segment(0)
+        c2i = i2c.inverse()
+        for handle, point in zip(self._handles[1:-1], points[1:-1], strict=True):
+            handle.pos = c2i.transform_point(*point)
+
+        xs, ys = zip(*points, strict=True)
+        index.set_route(
+            self,
+            (
+                min(xs) - MARGIN,
+                min(ys) - MARGIN,
+                max(xs) - min(xs) + 2 * MARGIN,
+                max(ys) - min(ys) + 2 * MARGIN,
+            ),
+        )
+
+    def inner_unlink(self, unlink_event):
+        if self.diagram:
+            diagram_index(self.diagram).remove_route(self)
+        super().inner_unlink(unlink_event)
 
 
 def text_technology(item: C4DependencyItem):
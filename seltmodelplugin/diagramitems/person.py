@@ -3,22 +3,32 @@ from math import pi
 from gaphor import UML
 from seltmodelplugin import c4model
 from gaphor.diagram.presentation import ElementPresentation, Named, text_name
-from gaphor.diagram.shapes import Box, CssNode, Text, stroke
+from gaphor.diagram.shapes import CssNode, stroke
 from gaphor.diagram.support import represents
 from gaphor.UML.compartments import text_stereotypes
+from seltmodelplugin.diagramitems.shapes import CachedText, DetailBox, draw_coarse
+from seltmodelplugin.spatial import SpatialItem
 
 
 @represents(c4model.C4Person)
-class C4PersonItem(Named, ElementPresentation):
+class C4PersonItem(SpatialItem, Named, ElementPresentation):
     def __init__(self, diagram, id=None):
         super().__init__(diagram, id, width=48, height=48)
+        # The subject the shape was built for
+        self._shape_key = None
 
         self.watch("subject.name")
         self.watch("subject[C4Person].description")
         self.watch("subject.appliedStereotype.classifier.name")
 
+        self.watch("subject", self.update_shapes)
+
     def update_shapes(self, event=None):
-        self.shape = Box(
+        if self._shape and self.subject is self._shape_key:
+            return
+        self._shape_key = self.subject
+
+        self.shape = DetailBox(
             text_stereotypes(
                 self,
                 lambda: [self.diagram.gettext("profile")]
@@ -29,11 +39,12 @@ class C4PersonItem(Named, ElementPresentation):
             CssNode(
                 "description",
                 self.subject,
-                Text(
+                CachedText(
                     text=lambda: self.subject.description or "",
                 ),
             ),
             draw=draw_person,
+            coarse=draw_coarse,
         )
 
 
@@ -4,20 +4,46 @@ import os
 from pathlib import Path
 
 from seltmodelplugin.c4model import seltFile
+from seltmodelplugin.imaging import (
+    file_key,
+    image_decoder,
+    surface_cache,
+    thumbnail_cache,
+    to_surface,
+)
+from seltmodelplugin.imaging.pyramid import (
+    MAX_LEVEL,
+    decode_level,
+    device_zoom,
+    downscale_surface,
+    in_clip,
+    known_source_info,
+    level_for,
+    level_size,
+    source_info,
+)
+from seltmodelplugin.imaging.vector import can_render, load_vector, rasterize
+from seltmodelplugin.imaging.tiles import (
+    TILE_SIZE,
+    decode_tile,
+    tile_cache,
+    tile_decoder,
+    visible_tiles,
+)
 from gaphor.diagram.presentation import ElementPresentation, text_name
-from gaphor.diagram.shapes import Box, CssNode, Text, stroke
+from gaphor.diagram.shapes import CssNode, Text, stroke
 from gaphor.diagram.support import represents
+from seltmodelplugin.diagramitems.shapes import DETAIL_ZOOM, DetailBox
+from seltmodelplugin.spatial import SpatialItem
 
 from gaphor.abc import Service
 
-import cairo
-from PIL import Image
 import logging
 
 logger = logging.getLogger(__name__)
 
 @represents(seltFile)
-class seltFileItem(ElementPresentation):
+class seltFileItem(SpatialItem, ElementPresentation):
     """Class for handling file attachment presentation with image rendering support."""
 
     def __init__(self, diagram, id=None):
@@ -35,10 +61,12 @@ class seltFileItem(ElementPresentation):
                     '.pbm', '.pnm'
                 }:
                     return ""  # Empty string for supported image formats
+                if can_render(file_path):
+                    return ""  # Rendered SVG or PDF document
                 return file_path.name  # File name with extension
             return "No file"  # Render "No file" if filePath doesn't exist
 
-        self.shape = Box(
+        self.shape = DetailBox(
             CssNode(
                 "body",
                 None,
@@ -49,15 +77,43 @@ class seltFileItem(ElementPresentation):
             draw=self.draw_content,
         )
         
-        self.watch("subject[seltFile].filePath")  # Watch for changes to filePath
-        self.watch("subject[seltFile].modified")  # Watch for changes to modified flag
+        self._file_key = None
+        self._file_key_generation = -1
 
+        self.watch("subject[seltFile].filePath", self.on_file_changed)  # Watch for changes to filePath
+        self.watch("subject[seltFile].modified", self.on_file_changed)  # Watch for changes to modified flag
+
+    def on_file_changed(self, event=None):
+        """Drop cached surfaces for the old and the current file."""
+        old_path = getattr(event, "old_value", None)
+        for path in (old_path, self.subject and self.subject.filePath):
+            if isinstance(path, str) and path:
+                surface_cache.invalidate(path)
+                tile_cache.invalidate(path)
+        self._file_key = None
+        self.request_update()
 
 
     def draw_content(self, box, context, bounding_box):
         cr = context.cairo
         x, y, w, h = bounding_box
-        scale_xy, surface = self.create_image_surface()
+        if not in_clip(cr, bounding_box):
+            # Scrolled out of view: don't even start decoding
+            return
+        zoom = device_zoom(cr)
+
+        if self.subject and can_render(self.subject.filePath):
+            if not self.draw_vector(context, bounding_box, zoom):
+                self.draw_border(box, context, bounding_box)
+            return
+
+        info = self._source_info()
+        if info is not None and info.tiled:
+            if not self.draw_tiles(context, bounding_box, zoom, info):
+                self.draw_border(box, context, bounding_box)
+            return
+
+        scale_xy, surface = self.create_image_surface(zoom)
 
         if surface:
             cr.save()
@@ -70,39 +126,220 @@ class seltFileItem(ElementPresentation):
             # Default behavior if no valid image is found
             self.draw_border(box, context, bounding_box)
 
-    def create_image_surface(self):
-        """Create a surface from the attached image file."""
+    def _current_file_key(self):
+        """``file_key()`` of the attached file, memoized until the surface
+        cache is invalidated."""
         if not self.subject or not self.subject.filePath:
             logger.warning("No file path found for rendering.")
+            return None
+
+        if self._file_key is None or self._file_key_generation != surface_cache.generation:
+            self._file_key_generation = surface_cache.generation
+            self._file_key = file_key(self.subject.filePath)
+            if self._file_key is None:
+                logger.error(f"File not found: {self.subject.filePath}")
+        return self._file_key
+
+    def _source_info(self):
+        """Size and tiling of the attached image, once its header is read."""
+        if self._current_file_key() is None:
+            return None
+
+        info = known_source_info(self._file_key)
+        if info is None:
+            image_decoder.request(
+                (self._file_key, None),
+                source_info,
+                self._file_key,
+                on_ready=self._on_image_ready,
+                store=False,
+            )
+        return info
+
+    def create_image_surface(self, zoom=1.0):
+        """Create a surface from the attached image file.
+
+        The image is decoded in the background, at the pyramid level matching
+        the item size at ``zoom``. Until it is ready another cached level is
+        returned, or ``None`` so the placeholder is drawn.
+        """
+        info = self._source_info()
+        if info is None:
             return None, None
 
         file_path = Path(self.subject.filePath)
-        
-        if not file_path.exists():
-            logger.error(f"File not found: {file_path}")
-            return None, None
+        size = info.size
+        level = level_for(size, (self.width, self.height), zoom)
+        key = (self._file_key, level)
+        surface = surface_cache.get(key)
+        if surface is None:
+            image_decoder.request(
+                key,
+                self._decode_surface,
+                file_path,
+                self._file_key,
+                size,
+                level,
+                on_ready=self._on_image_ready,
+            )
+            surface = self._nearest_cached_level(level)
+            if surface is None:
+                return None, None
+
+        # Calculate scaling factors
+        surface_width, surface_height = surface.get_width(), surface.get_height()
+        width_ratio, height_ratio = self.width / surface_width, self.height / surface_height
+        scale_xy = min(width_ratio, height_ratio)
+
+        return scale_xy, surface
+
+    def draw_vector(self, context, bounding_box, zoom=1.0):
+        """Replay the recorded SVG or PDF document, scaled to fit the item.
+
+        Below ``DETAIL_ZOOM`` a low resolution raster of the document is
+        drawn instead, which costs the same for every document.
+
+        Returns ``False`` while the document is still being parsed.
+        """
+        if self._current_file_key() is None:
+            return False
+
+        key = (self._file_key, "vector")
+        vector = surface_cache.get(key)
+        if vector is None:
+            image_decoder.request(
+                key, load_vector, self.subject.filePath, on_ready=self._on_image_ready
+            )
+            return False
+
+        if zoom < DETAIL_ZOOM:
+            self.draw_vector_thumbnail(context, bounding_box, vector)
+            return True
+
+        cr = context.cairo
+        x, y, w, h = bounding_box
+        width, height = vector.size
+        scale = min(self.width / width, self.height / height)
+        cr.save()
+        cr.translate(x, y)
+        cr.scale(scale, scale)
+        cr.rectangle(0, 0, width, height)
+        cr.clip()
+        cr.set_source_surface(vector.surface, 0, 0)
+        cr.paint()
+        cr.restore()
+        return True
+
+    def draw_vector_thumbnail(self, context, bounding_box, vector):
+        size = (
+            max(1, round(self.width * DETAIL_ZOOM)),
+            max(1, round(self.height * DETAIL_ZOOM)),
+        )
+        key = (self._file_key, ("vector", size))
+        surface = surface_cache.get(key)
+        if surface is None:
+            surface = rasterize(vector, size)
+            surface_cache.put(key, surface)
+
+        cr = context.cairo
+        x, y, w, h = bounding_box
+        scale = min(self.width / surface.get_width(), self.height / surface.get_height())
+        cr.save()
+        cr.translate(x, y)
+        cr.scale(scale, scale)
+        cr.set_source_surface(surface, 0, 0)
+        cr.paint()
+        cr.restore()
+
+    def draw_tiles(self, context, bounding_box, zoom, info):
+        """Draw the tiles of a large image that are in view.
 
-        try:
+        Missing tiles are decoded in the background. Returns ``False`` if
+        nothing could be drawn yet.
+        """
+        cr = context.cairo
+        x, y, w, h = bounding_box
+        width, height = info.size
+        scale = min(self.width / width, self.height / height)
+        level = level_for(info.size, (self.width, self.height), zoom)
+        factor = 1 << level
+
+        x1, y1, x2, y2 = cr.clip_extents()
+        region = ((x1 - x) / scale, (y1 - y) / scale, (x2 - x) / scale, (y2 - y) / scale)
+
+        file_path = Path(self.subject.filePath)
+        drawn = False
+        cr.save()
+        cr.translate(x, y)
+        cr.scale(scale * factor, scale * factor)
+        for column, row in visible_tiles(info.size, level, region):
+            key = (self._file_key, (level, column, row))
+            surface = tile_cache.get(key)
+            if surface is None:
+                tile_decoder.request(
+                    key,
+                    self._decode_tile,
+                    file_path,
+                    self._file_key,
+                    info.size,
+                    level,
+                    column,
+                    row,
+                    on_ready=self._on_image_ready,
+                )
+                continue
+            cr.set_source_surface(surface, column * TILE_SIZE, row * TILE_SIZE)
+            cr.paint()
+            drawn = True
+        cr.restore()
+        return drawn
+
+    def _decode_tile(self, file_path, key, size, level, column, row):
+        """Decode a tile. Runs on the image decoder thread pool."""
+        tile = (level, column, row)
+        surface = thumbnail_cache.load(key, tile)
+        if surface is None:
+            surface = decode_tile(file_path, size, level, column, row)
+            thumbnail_cache.store(key, tile, surface)
+        return surface
+
+    def _on_image_ready(self):
+        if self.subject:
+            self.request_update()
+
+    def _decode_surface(self, file_path, key, size, level):
+        """Decode a pyramid level. Runs on the image decoder thread pool."""
+        surface = thumbnail_cache.load(key, level)
+        if surface is not None:
+            return surface
+
+        surface = self._from_finer_level(key, size, level)
+        if surface is None:
             # Open the image and create a Cairo surface
-            image = Image.open(file_path)
-            surface = self._from_pil(image)
+            with decode_level(file_path, level) as image:
+                surface = self._from_pil(image)
+        thumbnail_cache.store(key, level, surface)
+        return surface
 
-            # Calculate scaling factors
-            surface_width, surface_height = surface.get_width(), surface.get_height()
-            width_ratio, height_ratio = self.width / surface_width, self.height / surface_height
-            scale_xy = min(width_ratio, height_ratio)
+    def _from_finer_level(self, key, size, level):
+        """Downscale an already decoded, finer level instead of reading the file."""
+        for finer in range(level - 1, -1, -1):
+            finer_surface = surface_cache.get((key, finer))
+            if finer_surface is not None:
+                return downscale_surface(finer_surface, level_size(size, level))
+        return None
 
-            return scale_xy, surface
-        except Exception as e:
-            logger.error(f"Error loading image from {file_path}: {e}")
-            return None, None
+    def _nearest_cached_level(self, level):
+        for distance in range(1, MAX_LEVEL + 1):
+            for other in (level - distance, level + distance):
+                key = (self._file_key, other)
+                if 0 <= other <= MAX_LEVEL and key in surface_cache:
+                    return surface_cache.get(key)
+        return None
 
-    def _from_pil(self, im, alpha=1.0, format=cairo.FORMAT_ARGB32):
+    def _from_pil(self, im):
         """Create a Cairo surface from a Pillow Image."""
-        if "A" not in im.getbands():
-            im.putalpha(int(alpha * 256.0))
-        arr = bytearray(im.tobytes("raw", "BGRa"))
-        return cairo.ImageSurface.create_for_data(arr, format, im.width, im.height)
+        return to_surface(im)
 
     def draw_border(self, box, context, bounding_box):
         cr = context.cairo
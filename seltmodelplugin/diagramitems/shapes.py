@@ -0,0 +1,83 @@
+"""Shapes shared by the diagram items."""
+
+from gaphor.diagram.shapes import Box, Text, stroke
+from seltmodelplugin.imaging.pyramid import device_zoom
+
+# Device pixels per unit below which text can not be read: at 0.5 the
+# default 14 px font is drawn 7 px high
+DETAIL_ZOOM = 0.5
+
+# Items smaller than this many device pixels are not drawn at all
+MIN_VISIBLE_PIXELS = 2
+
+# Style properties that affect the size of a text
+TEXT_STYLE = (
+    "font-family",
+    "font-size",
+    "font-weight",
+    "font-style",
+    "text-decoration",
+    "text-align",
+    "white-space",
+    "min-width",
+    "max-width",
+    "min-height",
+    "padding",
+)
+
+
+class CachedText(Text):
+    """A ``Text`` that measures its layout again only when the text, its
+    style or the available width changed.
+
+    ``Text`` lays out the text on every update of the item, which adds up
+    for items nested deep in a large diagram.
+    """
+
+    def __init__(self, text):
+        super().__init__(text)
+        self._size_key = None
+        self._size = (0, 0)
+
+    def size(self, context, bounding_box=None):
+        style = context.style
+        key = (
+            self.text(style),
+            bounding_box.width if bounding_box else None,
+            *(style.get(name) for name in TEXT_STYLE),
+        )
+        if key != self._size_key:
+            self._size = super().size(context, bounding_box)
+            self._size_key = key
+        return self._size
+
+
+class DetailBox(Box):
+    """A ``Box`` that is drawn with less detail when zoomed out.
+
+    Below ``DETAIL_ZOOM`` the children, i.e. the text, are left out and
+    only the border is drawn, by ``coarse`` if given. Items that would be
+    drawn smaller than ``MIN_VISIBLE_PIXELS`` are skipped. The layout is
+    not affected, so items keep their size at every zoom level.
+    """
+
+    def __init__(self, *children, coarse=None, **kwargs):
+        super().__init__(*children, **kwargs)
+        self._draw_coarse = coarse
+
+    def draw(self, context, bounding_box):
+        zoom = device_zoom(context.cairo)
+        if zoom >= DETAIL_ZOOM:
+            super().draw(context, bounding_box)
+            return
+        if max(bounding_box.width, bounding_box.height) * zoom < MIN_VISIBLE_PIXELS:
+            return
+        draw = self._draw_coarse or self._draw_border
+        if draw:
+            draw(self, context, bounding_box)
+
+
+def draw_coarse(box, context, bounding_box):
+    """Draw a plain filled rectangle, in place of a detailed shape."""
+    context.cairo.rectangle(*bounding_box)
+    stroke(context, fill=True, dash=False)
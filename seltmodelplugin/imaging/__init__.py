@@ -0,0 +1,6 @@
+# ruff: noqa: F401
+
+from seltmodelplugin.imaging.convert import to_surface
+from seltmodelplugin.imaging.decoder import ImageDecoder, image_decoder
+from seltmodelplugin.imaging.diskcache import ThumbnailCache, thumbnail_cache
+from seltmodelplugin.imaging.surfacecache import SurfaceCache, file_key, surface_cache
@@ -0,0 +1,135 @@
+"""Convert Pillow images to cairo surfaces.
+
+Pixels are written straight into the buffer of a new ARGB32 image surface,
+a band of rows at a time, so besides the source image only one frame (plus
+one band of scratch space) is held. NumPy is used when it is available;
+it is imported on the first conversion, not with this module.
+"""
+
+import functools
+import sys
+
+import cairo
+
+BAND_PIXELS = 1 << 18
+
+# Byte offsets of B, G, R and A in a native endian ARGB32 pixel
+if sys.byteorder == "little":
+    B, G, R, A = 0, 1, 2, 3
+else:
+    A, R, G, B = 0, 1, 2, 3
+
+HIGH_DEPTH_MODES = {"I", "F", "I;16", "I;16L", "I;16B", "I;16N"}
+
+
+def to_surface(image):
+    """Create a premultiplied ARGB32 surface from a Pillow image of any mode.
+
+    The source image is left untouched.
+    """
+    image, scale = _prepare(image)
+    width, height = image.size
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    stride = surface.get_stride()
+    data = surface.get_data()
+
+    band_rows = max(1, BAND_PIXELS // max(width, 1))
+    fill = _fill_numpy if _numpy() is not None else _fill_pillow
+    for top in range(0, height, band_rows):
+        bottom = min(top + band_rows, height)
+        band = _normalize(image.crop((0, top, width, bottom)), scale)
+        fill(data[top * stride : bottom * stride], band, stride)
+
+    surface.mark_dirty()
+    return surface
+
+
+def _prepare(image):
+    """Bring ``image`` to a mode that can be converted band by band.
+
+    Returns the image and, for high bit depth images, the ``(offset,
+    factor)`` that maps its values to 0..255.
+    """
+    mode = image.mode
+    if mode in HIGH_DEPTH_MODES:
+        if mode.startswith("I;16"):
+            return image, (0, 1 / 256)
+        low, high = image.getextrema()
+        if mode == "F" and low >= 0 and high <= 1:
+            return image, (0, 255)
+        if low >= 0 and high <= 255:
+            return image, (0, 1)
+        return image, (low, 255 / ((high - low) or 1))
+    if mode in ("P", "PA"):
+        has_alpha = mode == "PA" or "transparency" in image.info
+        return image.convert("RGBA" if has_alpha else "RGB"), None
+    return image, None
+
+
+def _normalize(band, scale):
+    """Convert a band to one of L, RGB or RGBA."""
+    mode = band.mode
+    if mode in ("L", "RGB", "RGBA"):
+        return band
+    if scale is not None:
+        offset, factor = scale
+        if mode.startswith("I;16"):
+            band = band.convert("I")
+        return band.point(lambda v: (v - offset) * factor).convert("L")
+    if mode == "1":
+        return band.convert("L")
+    if mode in ("LA", "La", "RGBa") or "A" in band.getbands():
+        return band.convert("RGBA")
+    return band.convert("RGB")
+
+
+@functools.cache
+def _numpy():
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
+
+
+def _fill_numpy(data, band, stride):
+    np = _numpy()
+    width, height = band.size
+    dst = np.frombuffer(data, dtype=np.uint8).reshape(height, stride)[
+        :, : width * 4
+    ].reshape(height, width, 4)
+    src = np.asarray(band)
+
+    if band.mode == "L":
+        dst[..., B] = dst[..., G] = dst[..., R] = src
+        dst[..., A] = 255
+    elif band.mode == "RGB":
+        dst[..., B] = src[..., 2]
+        dst[..., G] = src[..., 1]
+        dst[..., R] = src[..., 0]
+        dst[..., A] = 255
+    else:
+        alpha = src[..., 3].astype(np.uint16)
+        for channel, offset in ((0, R), (1, G), (2, B)):
+            premultiplied = src[..., channel] * alpha
+            premultiplied += 127
+            premultiplied //= 255
+            dst[..., offset] = premultiplied
+        dst[..., A] = src[..., 3]
+
+
+def _fill_pillow(data, band, stride):
+    if band.mode != "RGBA":
+        band = band.convert("RGBA")
+    if sys.byteorder == "little":
+        rows = band.tobytes("raw", "BGRa")
+    else:
+        rgba = band.convert("RGBa").tobytes()
+        rows = bytearray(len(rgba))
+        rows[0::4], rows[1::4], rows[2::4], rows[3::4] = (
+            rgba[3::4],
+            rgba[0::4],
+            rgba[1::4],
+            rgba[2::4],
+        )
+    data[: len(rows)] = rows
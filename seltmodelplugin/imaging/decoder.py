@@ -0,0 +1,64 @@
+"""Decode image surfaces on a thread pool."""
+
+import logging
+
+from seltmodelplugin.background import submit
+from seltmodelplugin.imaging.surfacecache import surface_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ImageDecoder:
+    """Decode surfaces in the background, at most one job per cache key.
+
+    When a job finishes its surface is stored in the surface cache and all
+    callbacks waiting for that key are called on the main loop.
+    """
+
+    def __init__(self, cache=surface_cache):
+        self.cache = cache
+        self._pending: dict = {}
+        self._failed: set = set()
+
+    def is_pending(self, key):
+        return key in self._pending
+
+    def has_failed(self, key):
+        return key in self._failed
+
+    def request(self, key, decode, *args, on_ready=None, store=True):
+        """Run ``decode(*args)`` in the background, unless a job for ``key``
+        is already running or has failed before.
+
+        With ``store`` the result is put in the surface cache under ``key``.
+        """
+        if key in self._failed:
+            return
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            if on_ready:
+                callbacks.append(on_ready)
+            return
+        self._pending[key] = [on_ready] if on_ready else []
+        submit(
+            "image-decoder",
+            decode,
+            *args,
+            callback=lambda future: self._on_done(key, future, store),
+        )
+
+    def _on_done(self, key, future, store):
+        callbacks = self._pending.pop(key, ())
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Error decoding image {key[0][0]}: {e}")
+            self._failed.add(key)
+            return
+        if store and result is not None:
+            self.cache.put(key, result)
+        for callback in callbacks:
+            callback()
+
+
+image_decoder = ImageDecoder()
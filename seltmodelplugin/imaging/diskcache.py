@@ -0,0 +1,178 @@
+"""Persistent cache of pre-scaled thumbnails.
+
+Thumbnails are stored as raw, premultiplied ARGB32 pixels behind a small
+header. A cache file is memory-mapped and handed to
+``cairo.ImageSurface.create_for_data`` as is, so loading a thumbnail costs
+no decoding at all.
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+import cairo
+from gi.repository import GLib
+
+from seltmodelplugin.background import submit
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SELT"
+VERSION = 1
+# magic, version, width, height, stride; padded so pixel data stays aligned
+HEADER = struct.Struct("<4sIIII")
+HEADER_SIZE = 32
+SUFFIX = ".argb"
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+MAX_ENTRY_BYTES = 16 * 1024 * 1024
+
+
+def default_cache_dir():
+    return Path(GLib.get_user_cache_dir()) / "seltmodelplugin" / "thumbnails"
+
+
+class ThumbnailCache:
+    """Content addressed thumbnails, keyed by ``file_key()`` and level.
+
+    Stale entries are removed by ``collect_garbage()``: first everything
+    not used for ``max_age`` seconds, then the least recently used files
+    until the cache fits in ``max_bytes``.
+    """
+
+    def __init__(
+        self, directory=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE
+    ):
+        self._directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_entry_bytes = min(MAX_ENTRY_BYTES, max_bytes // 8)
+        # Start "full", so the first write of a session triggers a collection
+        self._written = max_bytes
+        self._gc_scheduled = False
+
+    @property
+    def directory(self):
+        if self._directory is None:
+            self._directory = default_cache_dir()
+        return self._directory
+
+    def path_for(self, key, level):
+        name = hashlib.blake2b(
+            repr((key, level)).encode("utf-8"), digest_size=20
+        ).hexdigest()
+        return self.directory / name[:2] / f"{name}{SUFFIX}"
+
+    def load(self, key, level):
+        """Map a stored thumbnail into a surface, or return ``None``."""
+        path = self.path_for(key, level)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            magic, version, width, height, stride = HEADER.unpack_from(mapped)
+        except struct.error:
+            magic = None
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or len(mapped) < HEADER_SIZE + stride * height
+        ):
+            logger.debug(f"Discarding invalid thumbnail {path}")
+            mapped.close()
+            self._remove(path)
+            return None
+
+        try:
+            # Mark as recently used for garbage collection
+            os.utime(path)
+        except OSError:
+            pass
+
+        data = memoryview(mapped)[HEADER_SIZE : HEADER_SIZE + stride * height]
+        return cairo.ImageSurface.create_for_data(
+            data, cairo.FORMAT_ARGB32, width, height, stride
+        )
+
+    def store(self, key, level, surface):
+        """Write ``surface`` to the cache, atomically."""
+        if surface.get_format() != cairo.FORMAT_ARGB32:
+            return
+        surface.flush()
+        width, height, stride = (
+            surface.get_width(),
+            surface.get_height(),
+            surface.get_stride(),
+        )
+        nbytes = HEADER_SIZE + stride * height
+        if nbytes > self.max_entry_bytes:
+            return
+
+        path = self.path_for(key, level)
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique name, the same thumbnail may be stored by two threads
+            with tempfile.NamedTemporaryFile(
+                dir=path.parent, suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = Path(f.name)
+                f.write(HEADER.pack(MAGIC, VERSION, width, height, stride))
+                f.write(bytes(HEADER_SIZE - HEADER.size))
+                f.write(surface.get_data())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write thumbnail {path}: {e}")
+            if tmp_path:
+                self._remove(tmp_path)
+            return
+
+        self._written += nbytes
+        if not self._gc_scheduled and self._written > self.max_bytes // 10:
+            self._gc_scheduled = True
+            submit("thumbnail-cache", self.collect_garbage)
+
+    def collect_garbage(self):
+        """Remove thumbnails that are too old, then the least recently used
+        ones until the cache fits its size limit."""
+        self._gc_scheduled = False
+        self._written = 0
+        now = time.time()
+        entries = []
+        total = 0
+        for path in self.directory.glob(f"*/*{SUFFIX}"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age:
+                self._remove(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                total -= size
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+            return True
+        except OSError:
+            return False
+
+
+thumbnail_cache = ThumbnailCache()
@@ -0,0 +1,146 @@
+"""Resolution levels for attached images.
+
+Level ``n`` of an image is the source downscaled by ``2 ** n``. Items ask
+for the coarsest level that still covers the on-screen size, so a small
+box on the canvas never holds a full resolution decode.
+"""
+
+import logging
+import math
+from typing import NamedTuple
+
+import cairo
+
+from seltmodelplugin.imaging.tiles import (
+    TILED_MIN_PIXELS,
+    reducible,
+    supports_regions,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 8
+MAX_SOURCE_SIZES = 4096
+# Images that have to be decoded as a whole may not take more than this
+MAX_DECODE_BYTES = 256 * 1024 * 1024
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class SourceInfo(NamedTuple):
+    size: tuple[int, int]
+    tiled: bool
+
+
+_sources: dict = {}
+
+
+def source_info(key):
+    """Size of the image identified by a ``file_key()``, and whether it is
+    big enough and suitable to be drawn in tiles.
+
+    Only the image header is read. The key includes mtime and size, so a
+    changed file gets a fresh entry.
+    """
+    info = _sources.get(key)
+    if info is None:
+        from PIL import Image
+
+        with Image.open(key[0]) as image:
+            info = SourceInfo(
+                image.size,
+                image.width * image.height >= TILED_MIN_PIXELS
+                and supports_regions(image),
+            )
+        if len(_sources) >= MAX_SOURCE_SIZES:
+            _sources.clear()
+        _sources[key] = info
+    return info
+
+
+def known_source_info(key):
+    """``SourceInfo`` if ``source_info()`` already read it, else ``None``."""
+    return _sources.get(key)
+
+
+def source_size(key):
+    return source_info(key).size
+
+
+def level_for(size, box_size, zoom=1.0):
+    """Coarsest level of an image of ``size`` that still covers ``box_size``
+    drawn at ``zoom`` device pixels per unit."""
+    width, height = size
+    box_width, box_height = box_size
+    if not (width and height and box_width > 0 and box_height > 0 and zoom > 0):
+        return 0
+    factor = max(width / box_width, height / box_height) / zoom
+    if factor < 2:
+        return 0
+    return min(int(math.log2(factor)), MAX_LEVEL)
+
+
+def level_size(size, level):
+    width, height = size
+    return max(1, width >> level), max(1, height >> level)
+
+
+def decode_level(file_path, level):
+    """Decode ``file_path`` at pyramid ``level``.
+
+    ``Image.draft`` lets JPEG decode straight at a reduced scale, and
+    ``Image.reduce`` does cheap box filtering for the remaining factor, so
+    the full resolution image is only expanded when it can't be avoided.
+    Images that would take more than ``MAX_DECODE_BYTES`` are refused.
+    """
+    from PIL import Image
+
+    image = Image.open(file_path)
+    target = level_size(image.size, level)
+    if level:
+        image.draft(None, target)
+    if image.width * image.height * 4 > MAX_DECODE_BYTES:
+        image.close()
+        raise ImageTooLarge(f"{image.width}x{image.height}")
+    if not level:
+        image.load()
+        return image
+
+    factor = min(image.width // target[0], image.height // target[1])
+    if factor > 1:
+        image = reducible(image).reduce(factor)
+    if image.width > target[0] or image.height > target[1]:
+        image.thumbnail(target)
+    return image
+
+
+def downscale_surface(surface, size):
+    """Render ``surface`` scaled down to ``size`` on a new image surface."""
+    width, height = size
+    target = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+    cr = cairo.Context(target)
+    cr.scale(width / surface.get_width(), height / surface.get_height())
+    cr.set_source_surface(surface, 0, 0)
+    cr.get_source().set_filter(cairo.FILTER_GOOD)
+    cr.paint()
+    target.flush()
+    return target
+
+
+def device_zoom(cr):
+    """Device pixels per user space unit for the current cairo context."""
+    matrix = cr.get_matrix()
+    x_scale, y_scale = cr.get_target().get_device_scale()
+    return max(
+        math.hypot(matrix.xx, matrix.yx) * x_scale,
+        math.hypot(matrix.xy, matrix.yy) * y_scale,
+    )
+
+
+def in_clip(cr, bounding_box):
+    """Whether ``bounding_box`` (in user space) intersects the clip region."""
+    x, y, width, height = bounding_box
+    x1, y1, x2, y2 = cr.clip_extents()
+    return x < x2 and y < y2 and x + width > x1 and y + height > y1
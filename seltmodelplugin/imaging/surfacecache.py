@@ -0,0 +1,133 @@
+"""Process-wide cache of decoded image surfaces.
+
+Surfaces are keyed on ``(resolved path, mtime_ns, size)``, so every item
+that points at the same file shares one decoded surface, and a file that
+changes on disk simply stops matching its old entry.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+def file_key(file_path):
+    """Return the cache key for ``file_path``, or ``None`` if it can not be
+    accessed."""
+    try:
+        resolved = Path(file_path).resolve()
+        st = resolved.stat()
+    except OSError:
+        return None
+    return (str(resolved), st.st_mtime_ns, st.st_size)
+
+
+def surface_nbytes(surface):
+    """Number of bytes held by a cairo image surface, or the ``nbytes`` a
+    cache entry reports about itself."""
+    nbytes = getattr(surface, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    return surface.get_stride() * surface.get_height()
+
+
+class SurfaceCache:
+    """LRU cache of cairo surfaces, bounded by the bytes they hold.
+
+    Keys are tuples whose first element is a ``file_key()``; anything after
+    it (e.g. a resolution level) is up to the caller.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self._entries: OrderedDict = OrderedDict()
+        self._by_path: dict[str, set] = {}
+        self._lock = threading.RLock()
+        self._max_bytes = max_bytes
+        self.nbytes = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes):
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Return the surface stored for ``key`` and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, surface, nbytes=None):
+        """Store ``surface`` under ``key``, evicting the least recently used
+        entries if the memory budget is exceeded."""
+        if nbytes is None:
+            nbytes = surface_nbytes(surface)
+        with self._lock:
+            self._discard(key)
+            if nbytes > self._max_bytes:
+                logger.debug(f"Surface for {key[0]} exceeds the cache budget")
+                return surface
+            self._entries[key] = (surface, nbytes)
+            self._by_path.setdefault(key[0][0], set()).add(key)
+            self.nbytes += nbytes
+            self._evict()
+        return surface
+
+    def invalidate(self, file_path):
+        """Drop every surface decoded from ``file_path``.
+
+        ``generation`` is bumped, so callers that memoize ``file_key()``
+        know they have to stat the file again.
+        """
+        resolved = str(Path(file_path).resolve())
+        with self._lock:
+            self.generation += 1
+            for key in list(self._by_path.get(resolved, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self.nbytes = 0
+            self.generation += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.nbytes -= entry[1]
+        keys = self._by_path.get(key[0][0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[key[0][0]]
+
+    def _evict(self):
+        while self.nbytes > self._max_bytes and self._entries:
+            self._discard(next(iter(self._entries)))
+
+
+surface_cache = SurfaceCache()
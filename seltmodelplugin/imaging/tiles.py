@@ -0,0 +1,229 @@
+"""Region decoding for very large raster attachments.
+
+Big images are drawn as a grid of ``TILE_SIZE`` tiles per pyramid level.
+Only the tiles in view are decoded, each from just the part of the file
+that covers it, so memory use does not depend on the size of the source.
+
+Reading a region relies on the tile list Pillow builds when opening an
+image: uncompressed tiled formats get one ``raw`` entry per tile, and
+uncompressed rasters (raw TIFF, BMP, PPM, ...) a single one that can be cut
+into row bands. The parts are read from the file and decoded with
+``Image.frombuffer``. Compressed formats can only be decoded as a whole.
+"""
+
+import logging
+
+from seltmodelplugin.imaging.convert import to_surface
+from seltmodelplugin.imaging.decoder import ImageDecoder
+from seltmodelplugin.imaging.surfacecache import SurfaceCache
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+TILED_MIN_PIXELS = 4096 * 4096
+MAX_REGION_BYTES = 32 * 1024 * 1024
+
+tile_cache = SurfaceCache(max_bytes=64 * 1024 * 1024)
+tile_decoder = ImageDecoder(tile_cache)
+
+# Modes ``Image.reduce`` works on
+REDUCIBLE_MODES = {"L", "LA", "RGB", "RGBA", "I", "F"}
+
+
+def reducible(image):
+    """``image``, converted to a mode ``Image.reduce`` can handle if it is
+    not in one."""
+    if image.mode.startswith("I;16"):
+        return image.convert("I").point(lambda v: v * (1 / 256)).convert("L")
+    if image.mode == "1":
+        return image.convert("L")
+    if image.mode not in REDUCIBLE_MODES:
+        return image.convert("RGBA")
+    return image
+
+
+class RegionNotSupported(Exception):
+    pass
+
+
+def supports_regions(image):
+    """Whether parts of ``image`` can be decoded without the whole.
+
+    Any failure to make sense of the tile list counts as no, the image is
+    then drawn from the pyramid levels instead.
+    """
+    try:
+        return _supports_regions(image)
+    except Exception as e:
+        logger.debug(f"Can not read regions of {image.format} image: {e}")
+        return False
+
+
+def _supports_regions(image):
+    tiles = [_unpack(tile) for tile in image.tile]
+    if not tiles or any(_raw_layout(image, tile) is None for tile in tiles):
+        return False
+    if len(tiles) == 1:
+        return tiles[0][1] == (0, 0, *image.size)
+    # Tiles should form a grid, not e.g. one full size tile per channel
+    left = min(extents[0] for _, extents, _, _ in tiles)
+    top = min(extents[1] for _, extents, _, _ in tiles)
+    right = max(extents[2] for _, extents, _, _ in tiles)
+    bottom = max(extents[3] for _, extents, _, _ in tiles)
+    area = sum((r - l) * (b - t) for _, (l, t, r, b), _, _ in tiles)
+    return (left, top) == (0, 0) and area == (right - left) * (bottom - top)
+
+
+def _unpack(tile):
+    """``(codec, extents, offset, args)`` of a tile, with ``args`` as a
+    tuple.
+
+    Tiles are unpacked by position: Pillow 11 made them named tuples, older
+    versions use plain ones.
+    """
+    codec, extents, offset, args = tile
+    if not isinstance(args, tuple):
+        args = (args,)
+    return codec, tuple(extents), offset, args
+
+
+def _raw_layout(image, tile):
+    """``(rawmode, stride, orientation)`` of an uncompressed tile, or
+    ``None``."""
+    codec, (left, _, right, _), _, args = tile
+    if codec != "raw":
+        return None
+    rawmode, stride, orientation = (*args, *(image.mode, 0, 1)[len(args) :])[:3]
+    if orientation not in (1, -1):
+        return None
+    if not stride:
+        from PIL import Image
+
+        try:
+            row = Image.new(image.mode, (right - left, 1))
+            stride = len(row.tobytes("raw", rawmode))
+        except (ValueError, OSError):
+            return None
+    return rawmode, stride, orientation
+
+
+def _region_tiles(image, box):
+    """The parts of the file to decode for ``box``, as ``(extents, offset,
+    rawmode, stride, orientation)``, with extents in image pixels."""
+    if not _supports_regions(image):
+        raise RegionNotSupported(image.format)
+    left, top, right, bottom = box
+    tiles = [_unpack(tile) for tile in image.tile]
+    if len(tiles) == 1:
+        tile = tiles[0]
+        rawmode, stride, orientation = _raw_layout(image, tile)
+        # Only the rows of the band are read, bottom-up files store them
+        # in reverse
+        first_row = top if orientation == 1 else image.height - bottom
+        return [
+            (
+                (0, top, image.width, bottom),
+                tile[2] + first_row * stride,
+                rawmode,
+                stride,
+                orientation,
+            )
+        ]
+
+    selected = []
+    for tile in tiles:
+        _, extents, offset, _ = tile
+        if (
+            extents[0] < right
+            and extents[2] > left
+            and extents[1] < bottom
+            and extents[3] > top
+        ):
+            selected.append((extents, offset, *_raw_layout(image, tile)))
+    return selected
+
+
+def read_region(file_path, box):
+    """Decode the part ``box`` of an image, reading only the tiles
+    covering it."""
+    from PIL import Image
+
+    with Image.open(file_path) as image:
+        tiles = _region_tiles(image, box)
+        mode = image.mode
+        palette = image.getpalette() if mode in ("P", "PA") else None
+
+    left, top, right, bottom = box
+    region = Image.new(mode, (right - left, bottom - top))
+    if palette:
+        region.putpalette(palette)
+    with open(file_path, "rb") as f:
+        for extents, offset, rawmode, stride, orientation in tiles:
+            tile_left, tile_top, tile_right, tile_bottom = extents
+            height = tile_bottom - tile_top
+            f.seek(offset)
+            part = Image.frombuffer(
+                mode,
+                (tile_right - tile_left, height),
+                f.read(stride * height),
+                "raw",
+                rawmode,
+                stride,
+                orientation,
+            )
+            region.paste(part, (tile_left - left, tile_top - top))
+    return region
+
+
+def tile_box(size, level, column, row):
+    """Source pixels covered by a tile."""
+    span = TILE_SIZE << level
+    width, height = size
+    return (
+        column * span,
+        row * span,
+        min((column + 1) * span, width),
+        min((row + 1) * span, height),
+    )
+
+
+def decode_tile(file_path, size, level, column, row):
+    """Decode one tile of pyramid ``level``.
+
+    The tile's source area is read in bands of rows small enough to stay
+    within ``MAX_REGION_BYTES``, and every band is reduced before the next
+    one is read.
+    """
+    from PIL import Image
+
+    factor = 1 << level
+    left, top, right, bottom = tile_box(size, level, column, row)
+    rows = MAX_REGION_BYTES // (size[0] * 4) // factor * factor
+    rows = max(rows, factor)
+
+    tile = None
+    for band_top in range(top, bottom, rows):
+        band = read_region(file_path, (left, band_top, right, min(band_top + rows, bottom)))
+        # Also for level 0, bands are pasted into a tile of their mode
+        band = reducible(band)
+        if factor > 1:
+            band = band.reduce(factor)
+        if tile is None:
+            tile = Image.new(
+                band.mode, (-(-(right - left) // factor), -(-(bottom - top) // factor))
+            )
+        tile.paste(band, (0, (band_top - top) // factor))
+    return to_surface(tile)
+
+
+def visible_tiles(size, level, region):
+    """Tile columns and rows of ``level`` intersecting ``region`` (in source
+    pixels)."""
+    span = TILE_SIZE << level
+    width, height = size
+    left, top, right, bottom = region
+    left, top = max(0, left), max(0, top)
+    right, bottom = min(width, right), min(height, bottom)
+    for row in range(int(top // span), int(-(-bottom // span))):
+        for column in range(int(left // span), int(-(-right // span))):
+            yield column, row
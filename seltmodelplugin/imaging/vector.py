@@ -0,0 +1,131 @@
+"""Render SVG and PDF attachments.
+
+A document is parsed once and drawn into a ``cairo.RecordingSurface``.
+Redrawing the item replays the recorded drawing operations, which stays
+sharp at every zoom level without parsing the document again.
+
+SVG support needs librsvg, PDF support Poppler, both through GObject
+introspection. Without them vector files are shown by name.
+"""
+
+import functools
+import logging
+from pathlib import Path
+from typing import NamedTuple
+
+import cairo
+import gi
+
+logger = logging.getLogger(__name__)
+
+SVG_SUFFIXES = {".svg", ".svgz"}
+PDF_SUFFIXES = {".pdf"}
+
+# Recording surfaces hold drawing operations, not pixels; weigh them by the
+# size of the source document instead
+MIN_RECORDING_BYTES = 64 * 1024
+
+
+class VectorImage(NamedTuple):
+    surface: cairo.RecordingSurface
+    size: tuple[float, float]
+    nbytes: int
+
+
+@functools.cache
+def _rsvg():
+    try:
+        gi.require_version("Rsvg", "2.0")
+        from gi.repository import Rsvg
+    except (ImportError, ValueError):
+        logger.info("librsvg is not available, SVG files are not rendered")
+        return None
+    return Rsvg
+
+
+@functools.cache
+def _poppler():
+    try:
+        gi.require_version("Poppler", "0.18")
+        from gi.repository import Poppler
+    except (ImportError, ValueError):
+        logger.info("Poppler is not available, PDF files are not rendered")
+        return None
+    return Poppler
+
+
+def can_render(file_path):
+    """Whether ``file_path`` is a vector document we can render."""
+    suffix = Path(file_path).suffix.lower()
+    if suffix in SVG_SUFFIXES:
+        return _rsvg() is not None
+    if suffix in PDF_SUFFIXES:
+        return _poppler() is not None
+    return False
+
+
+def load_vector(file_path):
+    """Parse a document and record it on a ``cairo.RecordingSurface``."""
+    file_path = Path(file_path)
+    if file_path.suffix.lower() in SVG_SUFFIXES:
+        surface, size = _record_svg(file_path)
+    else:
+        surface, size = _record_pdf(file_path)
+    return VectorImage(
+        surface, size, max(MIN_RECORDING_BYTES, file_path.stat().st_size)
+    )
+
+
+def _record_svg(file_path):
+    Rsvg = _rsvg()
+    handle = Rsvg.Handle.new_from_file(str(file_path))
+    has_size, width, height = handle.get_intrinsic_size_in_pixels()
+    if not has_size:
+        # No absolute size, e.g. only a viewBox: use the document's extents
+        _, rect, _ = handle.get_geometry_for_layer(
+            None, Rsvg.Rectangle(x=0, y=0, width=100, height=100)
+        )
+        width, height = rect.width, rect.height
+
+    surface = cairo.RecordingSurface(
+        cairo.CONTENT_COLOR_ALPHA, cairo.Rectangle(0, 0, width, height)
+    )
+    handle.render_document(
+        cairo.Context(surface), Rsvg.Rectangle(x=0, y=0, width=width, height=height)
+    )
+    return surface, (width, height)
+
+
+def _record_pdf(file_path):
+    Poppler = _poppler()
+    document = Poppler.Document.new_from_file(file_path.absolute().as_uri(), None)
+    page = document.get_page(0)
+    width, height = page.get_size()
+
+    surface = cairo.RecordingSurface(
+        cairo.CONTENT_COLOR_ALPHA, cairo.Rectangle(0, 0, width, height)
+    )
+    cr = cairo.Context(surface)
+    # PDF pages are transparent, while readers show them on white paper
+    cr.set_source_rgb(1, 1, 1)
+    cr.paint()
+    page.render(cr)
+    return surface, (width, height)
+
+
+def rasterize(vector, size):
+    """Draw ``vector`` on an image surface of at most ``size`` pixels,
+    keeping its aspect ratio."""
+    width, height = vector.size
+    scale = min(size[0] / width, size[1] / height)
+    surface = cairo.ImageSurface(
+        cairo.FORMAT_ARGB32,
+        max(1, round(width * scale)),
+        max(1, round(height * scale)),
+    )
+    cr = cairo.Context(surface)
+    cr.scale(scale, scale)
+    cr.set_source_surface(vector.surface, 0, 0)
+    cr.paint()
+    surface.flush()
+    return surface
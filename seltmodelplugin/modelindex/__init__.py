@@ -0,0 +1,3 @@
+# ruff: noqa: F401
+
+from seltmodelplugin.modelindex.modelindex import CONTAINER_TYPES, ModelIndex
@@ -0,0 +1,241 @@
+import heapq
+import itertools
+from collections import defaultdict
+
+from gaphor.abc import Service
+from gaphor.C4Model import c4model as gaphor_c4model
+from gaphor.core.eventmanager import event_handler
+from gaphor.core.modeling import Element
+from gaphor.core.modeling.coremodel import Dependency
+from gaphor.core.modeling.event import (
+    AssociationSet,
+    ElementCreated,
+    ElementDeleted,
+    ElementTypeUpdated,
+    ModelFlushed,
+    ModelReady,
+)
+from gaphor.UML.uml import Package
+from seltmodelplugin import c4model
+
+# Containers of both the C4 model shipped with Gaphor and our own
+CONTAINER_TYPES = (gaphor_c4model.C4Container, c4model.C4Container)
+
+OWNER_CONTAINER = tuple(cls.ownerContainer for cls in CONTAINER_TYPES)
+
+
+class Adjacency:
+    """Parent/child links of a one-to-many association, in both
+    directions.
+
+    Children are listed in the order of the parent's ``collection``
+    property, the order of the model.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._parent: dict[Element, Element] = {}
+        self._children: dict[Element, dict[Element, None]] = defaultdict(dict)
+
+    def set(self, child, parent):
+        self.remove(child)
+        if parent is not None:
+            self._parent[child] = parent
+            self._children[parent][child] = None
+
+    def remove(self, child):
+        parent = self._parent.pop(child, None)
+        if parent is not None:
+            children = self._children[parent]
+            children.pop(child, None)
+            if not children:
+                del self._children[parent]
+
+    def forget(self, element):
+        """Remove all links to and from ``element``."""
+        self.remove(element)
+        for child in self._children.pop(element, ()):
+            del self._parent[child]
+
+    def parent(self, child):
+        return self._parent.get(child)
+
+    def children(self, parent):
+        children = self._children.get(parent)
+        if not children:
+            return []
+        return [
+            child for child in getattr(parent, self.collection) if child in children
+        ]
+
+    def clear(self):
+        self._parent.clear()
+        self._children.clear()
+
+
+class ModelIndex(Service):
+    """Indexes of the model, kept up to date with every change.
+
+    Elements are indexed by type, dependencies by their client and
+    supplier, and packages and containers by their owner. Queries take
+    time in proportion to their result, not to the size of the model.
+    """
+
+    def __init__(self, event_manager, element_factory):
+        self.event_manager = event_manager
+        self.element_factory = element_factory
+        self._order = itertools.count()
+        self._by_type: dict[type, dict[Element, int]] = defaultdict(dict)
+        self._ends: dict[Dependency, tuple[Element | None, Element | None]] = {}
+        self._client_dependencies: dict[Element, dict[Dependency, None]] = defaultdict(
+            dict
+        )
+        self._supplier_dependencies: dict[
+            Element, dict[Dependency, None]
+        ] = defaultdict(dict)
+        self.nesting = Adjacency("nestedPackage")
+        self.containment = Adjacency("owningContainer")
+        self.event_manager.subscribe(self.on_model_ready)
+        self.event_manager.subscribe(self.on_model_flushed)
+        self.event_manager.subscribe(self.on_element_created)
+        self.event_manager.subscribe(self.on_element_deleted)
+        self.event_manager.subscribe(self.on_association_set)
+        self.event_manager.subscribe(self.on_element_type_updated)
+        self.rebuild()
+
+    def shutdown(self) -> None:
+        self.event_manager.unsubscribe(self.on_model_ready)
+        self.event_manager.unsubscribe(self.on_model_flushed)
+        self.event_manager.unsubscribe(self.on_element_created)
+        self.event_manager.unsubscribe(self.on_element_deleted)
+        self.event_manager.unsubscribe(self.on_association_set)
+        self.event_manager.unsubscribe(self.on_element_type_updated)
+
+    @event_handler(ModelReady)
+    def on_model_ready(self, event: ModelReady) -> None:
+        # Models are loaded with events blocked
+        self.rebuild()
+
+    @event_handler(ModelFlushed)
+    def on_model_flushed(self, event: ModelFlushed) -> None:
+        self.clear()
+
+    @event_handler(ElementCreated)
+    def on_element_created(self, event: ElementCreated) -> None:
+        self._add(event.element)
+
+    @event_handler(ElementDeleted)
+    def on_element_deleted(self, event: ElementDeleted) -> None:
+        self._remove(event.element)
+
+    @event_handler(AssociationSet)
+    def on_association_set(self, event: AssociationSet) -> None:
+        element = event.element
+        if element not in self._by_type.get(type(element), ()):
+            return
+        prop = event.property
+        if prop is Dependency.client or prop is Dependency.supplier:
+            self._set_ends(element, element.client, element.supplier)
+        elif prop is Package.package:
+            self.nesting.set(element, event.new_value)
+        elif prop in OWNER_CONTAINER:
+            self.containment.set(element, event.new_value)
+
+    @event_handler(ElementTypeUpdated)
+    def on_element_type_updated(self, event: ElementTypeUpdated) -> None:
+        order = self._discard(event.old_class, event.element)
+        if order is not None:
+            self._remove(event.element)
+            self._add(event.element, order)
+
+    def rebuild(self):
+        """Index all elements in the model."""
+        self.clear()
+        for element in self.element_factory.select():
+            self._add(element)
+
+    def clear(self):
+        self._by_type.clear()
+        self._ends.clear()
+        self._client_dependencies.clear()
+        self._supplier_dependencies.clear()
+        self.nesting.clear()
+        self.containment.clear()
+
+    def select(self, *types):
+        """Iterate the elements of ``types``, including subtypes, in the
+        order they were created."""
+        buckets = [
+            ((order, element) for element, order in elements.items())
+            for cls, elements in self._by_type.items()
+            if issubclass(cls, types)
+        ]
+        if len(buckets) == 1:
+            return (element for _, element in buckets[0])
+        return (element for _, element in heapq.merge(*buckets, key=lambda e: e[0]))
+
+    def client_dependencies(self, element):
+        """The dependencies ``element`` is the client of."""
+        return list(self._client_dependencies.get(element, ()))
+
+    def supplier_dependencies(self, element):
+        """The dependencies ``element`` is the supplier of."""
+        return list(self._supplier_dependencies.get(element, ()))
+
+    def nested_packages(self, element):
+        return self.nesting.children(element)
+
+    def owned_containers(self, element):
+        return self.containment.children(element)
+
+    def _add(self, element, order=None):
+        self._by_type[type(element)][element] = (
+            next(self._order) if order is None else order
+        )
+        if isinstance(element, Dependency):
+            self._set_ends(element, element.client, element.supplier)
+        if isinstance(element, Package):
+            self.nesting.set(element, element.package)
+        if isinstance(element, CONTAINER_TYPES):
+            self.containment.set(element, element.ownerContainer)
+
+    def _discard(self, cls, element):
+        elements = self._by_type.get(cls)
+        if elements is None:
+            return None
+        order = elements.pop(element, None)
+        if not elements:
+            del self._by_type[cls]
+        return order
+
+    def _remove(self, element):
+        self._discard(type(element), element)
+        if element in self._ends:
+            self._set_ends(element, None, None)
+            del self._ends[element]
+        self.nesting.forget(element)
+        self.containment.forget(element)
+        # Dependencies still referring to the element are updated by their
+        # own events while the element is unlinked
+        self._client_dependencies.pop(element, None)
+        self._supplier_dependencies.pop(element, None)
+
+    def _set_ends(self, dependency, client, supplier):
+        old_client, old_supplier = self._ends.get(dependency, (None, None))
+        if old_client is not client:
+            _discard(self._client_dependencies, old_client, dependency)
+            if client is not None:
+                self._client_dependencies[client][dependency] = None
+        if old_supplier is not supplier:
+            _discard(self._supplier_dependencies, old_supplier, dependency)
+            if supplier is not None:
+                self._supplier_dependencies[supplier][dependency] = None
+        self._ends[dependency] = (client, supplier)
+
+
+def _discard(index, key, value):
+    values = index.get(key)
+    if values is not None:
+        values.pop(value, None)
+        if not values:
+            del index[key]
@@ -4,6 +4,7 @@ from collections.abc import Iterable
 
 from gaphor.abc import ModelingLanguage
 from seltmodelplugin import c4model, diagramitems
+from seltmodelplugin import iconname  # noqa: F401 registers the icon names
 from seltmodelplugin.toolbox import (
     c4model_diagram_types,
     c4model_element_types,
@@ -1,3 +1,8 @@
 # ruff: noqa: F401
 
+from seltmodelplugin.observer.filemetadata import (
+    FileMetadata,
+    FileMetadataCache,
+    file_metadata,
+)
 from seltmodelplugin.observer.updatefilesmetadata import ObserverService
@@ -0,0 +1,113 @@
+"""File metadata for the property pages, read in the background.
+
+Stat calls on slow or network mounts can take long, so they are kept off
+the main loop. Results are cached per path until the file changes, or the
+element starts referring to another file.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from seltmodelplugin.background import submit
+
+logger = logging.getLogger(__name__)
+
+
+class FileMetadata(NamedTuple):
+    exists: bool
+    size: int | None = None
+    mtime: float | None = None
+    dimensions: tuple[int, int] | None = None
+
+
+MISSING = FileMetadata(False)
+
+
+def read_metadata(file_path):
+    """Return the ``FileMetadata`` of ``file_path``.
+
+    For images, only the header is read to find their dimensions.
+    """
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return MISSING
+    return FileMetadata(True, st.st_size, st.st_mtime, _image_dimensions(file_path))
+
+
+def _image_dimensions(file_path):
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(file_path) as image:
+            return image.size
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+class FileMetadataCache:
+    """Metadata by resolved file path, at most one background read per path.
+
+    Callbacks waiting for a path are called on the main loop.
+    """
+
+    def __init__(self):
+        self._metadata: dict[Path, FileMetadata] = {}
+        self._pending: dict[Path, list] = {}
+
+    def get(self, file_path):
+        """The cached metadata of ``file_path``, or ``None``."""
+        return self._metadata.get(Path(file_path))
+
+    def request(self, file_path, on_ready):
+        """Call ``on_ready(metadata)`` with the metadata of ``file_path``.
+
+        Cached metadata is passed on at once, else it is read in the
+        background.
+        """
+        file_path = Path(file_path)
+        metadata = self._metadata.get(file_path)
+        if metadata is not None:
+            on_ready(metadata)
+            return
+        callbacks = self._pending.get(file_path)
+        if callbacks is not None:
+            callbacks.append(on_ready)
+            return
+        callbacks = self._pending[file_path] = [on_ready]
+        submit(
+            "file-metadata",
+            read_metadata,
+            file_path,
+            callback=lambda future: self._on_done(file_path, callbacks, future),
+        )
+
+    def invalidate(self, file_path):
+        file_path = Path(file_path)
+        self._metadata.pop(file_path, None)
+        # A read still running may predate the change: deliver, but do
+        # not cache its result
+        self._pending.pop(file_path, None)
+
+    def clear(self):
+        self._metadata.clear()
+        self._pending.clear()
+
+    def _on_done(self, file_path, callbacks, future):
+        try:
+            metadata = future.result()
+        except Exception as e:
+            logger.error(f"Could not read metadata of '{file_path}': {e}")
+            metadata = MISSING
+        else:
+            if self._pending.get(file_path) is callbacks:
+                self._metadata[file_path] = metadata
+        if self._pending.get(file_path) is callbacks:
+            del self._pending[file_path]
+        for callback in callbacks:
+            callback(metadata)
+
+
+file_metadata = FileMetadataCache()
@@ -0,0 +1,69 @@
+import logging
+from collections import defaultdict
+from pathlib import Path
+
+from gi.repository import Gio
+
+logger = logging.getLogger(__name__)
+
+RELEVANT_EVENTS = {
+    Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+    Gio.FileMonitorEvent.DELETED,
+    Gio.FileMonitorEvent.CREATED,
+    Gio.FileMonitorEvent.ATTRIBUTE_CHANGED,
+    Gio.FileMonitorEvent.MOVED_IN,
+    Gio.FileMonitorEvent.MOVED_OUT,
+    Gio.FileMonitorEvent.RENAMED,
+}
+
+
+class FileWatcher:
+    """Watch a set of files through monitors on their directories.
+
+    Gio uses the platform's native file notification (inotify, kqueue,
+    ReadDirectoryChangesW). Watching the directory instead of the file
+    itself also catches files that are replaced, deleted and recreated.
+    ``on_change`` is called with the path of every watched file that
+    changed.
+    """
+
+    def __init__(self, on_change):
+        self.on_change = on_change
+        self._files: dict[Path, set[Path]] = defaultdict(set)
+        self._monitors: dict[Path, Gio.FileMonitor] = {}
+
+    def update(self, file_paths):
+        """Watch exactly ``file_paths``, adding and removing directory
+        monitors as needed."""
+        files = defaultdict(set)
+        for file_path in file_paths:
+            files[file_path.parent].add(file_path)
+
+        for directory in set(self._monitors) - set(files):
+            self._monitors.pop(directory).cancel()
+        for directory in set(files) - set(self._monitors):
+            self._watch_directory(directory)
+        self._files = files
+
+    def clear(self):
+        self.update(())
+
+    def _watch_directory(self, directory):
+        try:
+            monitor = Gio.File.new_for_path(str(directory)).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+        except Exception as e:
+            logger.warning(f"Could not watch directory '{directory}': {e}")
+            return
+        monitor.connect("changed", self._on_changed, directory)
+        self._monitors[directory] = monitor
+
+    def _on_changed(self, monitor, file, other_file, event_type, directory):
+        if event_type not in RELEVANT_EVENTS:
+            return
+        watched = self._files.get(directory, ())
+        for changed in (file, other_file):
+            path = changed and changed.get_path()
+            if path and Path(path) in watched:
+                self.on_change(Path(path))
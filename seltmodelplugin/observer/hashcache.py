@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from gi.repository import GLib
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 10000
+
+
+def default_cache_file():
+    return Path(GLib.get_user_cache_dir()) / "seltmodelplugin" / "hashes.json"
+
+
+def hash_file(file_path):
+    """Streaming BLAKE2b digest of a file's content."""
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=32)).hexdigest()
+
+
+class HashCache:
+    """Content hashes, keyed on ``(device, inode, size, mtime_ns)``.
+
+    A file whose stat tuple did not change is not read again. The cache is
+    kept in a JSON file, so this also holds across sessions.
+    """
+
+    def __init__(self, cache_file=None):
+        self._cache_file = Path(cache_file) if cache_file else None
+        self._entries: dict[str, str] | None = None
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Saves may run on several threads at once; one at a time, so an
+        # older snapshot never replaces a newer one
+        self._save_lock = threading.Lock()
+
+    @property
+    def cache_file(self):
+        if self._cache_file is None:
+            self._cache_file = default_cache_file()
+        return self._cache_file
+
+    def digest(self, file_path, st=None):
+        """Return the content hash of ``file_path``, reading the file only
+        if its stat tuple is not in the cache."""
+        st = st or os.stat(file_path)
+        key = f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+        with self._lock:
+            entries = self._load()
+            digest = entries.get(key)
+        if digest is None:
+            digest = hash_file(file_path)
+            with self._lock:
+                entries[key] = digest
+                while len(entries) > MAX_ENTRIES:
+                    del entries[next(iter(entries))]
+                self._dirty = True
+        return digest
+
+    def save(self):
+        """Write the cache file if there are new entries."""
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries)
+            self._dirty = False
+        tmp_file = None
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=self.cache_file.parent,
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                tmp_file = Path(f.name)
+                f.write(data)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write hash cache '{self.cache_file}': {e}")
+            if tmp_file:
+                tmp_file.unlink(missing_ok=True)
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.cache_file.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+
+hash_cache = HashCache()
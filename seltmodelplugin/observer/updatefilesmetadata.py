@@ -1,62 +1,432 @@
 import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import NamedTuple
+
+from gi.repository import GLib
 
 from gaphor.abc import ActionProvider, Service
-from gaphor.core import Transaction
+from gaphor.core import Transaction, action, gettext
 from gaphor.core.eventmanager import event_handler
+from gaphor.core.modeling.event import (
+    AttributeUpdated,
+    ElementCreated,
+    ElementDeleted,
+    ModelFlushed,
+    ModelReady,
+)
+from seltmodelplugin.background import submit
 from seltmodelplugin.c4model import seltFile
+from seltmodelplugin.observer.filemetadata import file_metadata
+from seltmodelplugin.observer.filewatcher import FileWatcher
+from seltmodelplugin.observer.hashcache import hash_cache
 from gaphor.event import ModelSaved
 
 logger = logging.getLogger(__name__)
 
+# Seconds a single file check may take, e.g. on an unresponsive network
+# share, before the file is given up on
+STAT_TIMEOUT = 5.0
+
+# Files checked at the same time per scan
+STAT_WORKERS = 8
+
+# Saves within this many milliseconds (autosave, save-as) share one scan
+COALESCE_DELAY = 250
+
+
+class FileState(NamedTuple):
+    mtime: int
+    mtime_ns: int
+    size: int
+    digest: str | None = None
+
+
+def stat_file(file_path):
+    """Return the ``FileState`` of ``file_path``, or ``None`` if it does not
+    exist."""
+    try:
+        st = file_path.stat()
+    except FileNotFoundError:
+        return None
+    return FileState(int(st.st_mtime), st.st_mtime_ns, st.st_size)
+
+
+# Scan result of a file that could not be checked in time
+TIMED_OUT = FileState(-1, -1, -1)
+
+
+def is_modified(element, state):
+    """Whether the file changed since ``element`` recorded it.
+
+    Elements that recorded size and mtime_ns are compared on those, so two
+    edits within one second are noticed. If a content hash is known too, a
+    file that was only touched does not count as modified.
+    """
+    if state is None:
+        return True
+    if element.fileMtimeNs:
+        if (element.fileSize, element.fileMtimeNs) == (state.size, state.mtime_ns):
+            return False
+        if state.digest and element.fileHash:
+            return state.digest != element.fileHash
+        return True
+    return int(element.lastModified) != state.mtime
+
 
 class ObserverService(ActionProvider, Service):
-    """Monitor changes for the file attached"""
+    """Monitor changes for the file attached
+
+    All files are checked when a model is loaded or saved. In between,
+    the attached files are watched, and only the files the operating system
+    reports as changed are checked again.
+    """
 
-    def __init__(self, event_manager, element_factory):
+    def __init__(self, event_manager, element_factory, tools_menu=None):
         self.event_manager = event_manager
         self.element_factory = element_factory
+        self.tools_menu = tools_menu
+        self.verify_content = False
+        self.model_dir = Path.cwd()
+        self._paths: dict[seltFile, Path] = {}
+        self._index: dict[Path, set[seltFile]] = defaultdict(set)
+        self._watcher = FileWatcher(self.on_file_changed)
+        self._watch_source = None
+        self._scan_filename = None
+        self._full_scan = False
+        self._dirty_paths: set[Path] = set()
+        self._scan_source = None
+        self._scan_running = False
+        # Paths with a file check still running, possibly from an earlier
+        # scan that gave up on it
+        self._stats_running: set[Path] = set()
+        self.event_manager.subscribe(self.on_model_loaded)
         self.event_manager.subscribe(self.on_model_saved)
+        self.event_manager.subscribe(self.on_model_flushed)
+        self.event_manager.subscribe(self.on_element_created)
+        self.event_manager.subscribe(self.on_element_deleted)
+        self.event_manager.subscribe(self.on_file_path_updated)
+        if tools_menu:
+            tools_menu.add_actions(self)
 
     def shutdown(self) -> None:
+        if self.tools_menu:
+            self.tools_menu.remove_actions(self)
+        self.event_manager.unsubscribe(self.on_model_loaded)
         self.event_manager.unsubscribe(self.on_model_saved)
+        self.event_manager.unsubscribe(self.on_model_flushed)
+        self.event_manager.unsubscribe(self.on_element_created)
+        self.event_manager.unsubscribe(self.on_element_deleted)
+        self.event_manager.unsubscribe(self.on_file_path_updated)
+        self._watcher.clear()
+        for source in (self._scan_source, self._watch_source):
+            if source is not None:
+                GLib.source_remove(source)
+        self._scan_source = self._watch_source = None
+
+    @event_handler(ModelReady)
+    def on_model_loaded(self, event: ModelReady) -> None:
+        self.request_scan(event.filename)
 
     @event_handler(ModelSaved)
     def on_model_saved(self, event: ModelSaved) -> None:
-        self.trigger_function(event.filename)
+        self.request_scan(event.filename)
 
-    def trigger_function(self, filename):
-        model_dir = filename.parent if filename else Path.cwd()
+    @event_handler(ModelFlushed)
+    def on_model_flushed(self, event: ModelFlushed) -> None:
+        self._paths.clear()
+        self._index.clear()
+        self._dirty_paths.clear()
+        self._watcher.clear()
+        file_metadata.clear()
+
+    @event_handler(ElementCreated)
+    def on_element_created(self, event: ElementCreated) -> None:
+        if isinstance(event.element, seltFile):
+            self._track(event.element)
+
+    @event_handler(ElementDeleted)
+    def on_element_deleted(self, event: ElementDeleted) -> None:
+        if isinstance(event.element, seltFile):
+            self._untrack(event.element)
+            self._update_watches()
+
+    @event_handler(AttributeUpdated)
+    def on_file_path_updated(self, event: AttributeUpdated) -> None:
+        if event.property is seltFile.filePath:
+            self._track(event.element)
+
+    @action(
+        name="observer-verify-content",
+        label=gettext("Verify attached file contents"),
+        tooltip=gettext("Compare file contents, not only modification times"),
+        state=False,
+    )
+    def verify_content_action(self, active):
+        self.verify_content = active
+        if active:
+            self.request_scan(self._scan_filename)
+
+    def on_file_changed(self, file_path):
+        """Called by the file watcher for every change to an attached file."""
+        file_metadata.invalidate(file_path)
+        self._dirty_paths.add(file_path)
+        self._schedule_scan()
+
+    def _resolve(self, element):
+        return Path(os.path.normpath(self.model_dir / Path(element.filePath or "")))
+
+    def _track(self, element):
+        self._untrack(element)
+        if element.filePath:
+            file_path = self._resolve(element)
+            self._paths[element] = file_path
+            self._index[file_path].add(element)
+        self._update_watches()
+
+    def _untrack(self, element):
+        file_path = self._paths.pop(element, None)
+        if file_path is not None:
+            elements = self._index[file_path]
+            elements.discard(element)
+            if not elements:
+                del self._index[file_path]
 
+    def _update_watches(self):
+        """Sync the file watches with the index once the current burst of
+        model changes is over."""
+        if self._watch_source is None:
+            self._watch_source = GLib.idle_add(self._on_update_watches)
+
+    def _on_update_watches(self):
+        self._watch_source = None
+        self._watcher.update(self._index)
+        return GLib.SOURCE_REMOVE
+
+    def rebuild_index(self, filename):
+        """Index all seltFile elements by the file they refer to."""
+        self.model_dir = filename.parent if filename else Path.cwd()
+        self._paths.clear()
+        self._index.clear()
         for element in self.element_factory.select(seltFile):
-            file_path = Path(element.filePath)
-            file_path = model_dir / file_path
+            if element.filePath:
+                file_path = self._resolve(element)
+                self._paths[element] = file_path
+                self._index[file_path].add(element)
+        self._update_watches()
+
+    def request_scan(self, filename):
+        """Schedule a scan of all files, coalescing bursts of requests into
+        one.
+
+        If a scan is running, one more is done after it finishes.
+        """
+        self._scan_filename = filename
+        self._full_scan = True
+        self._schedule_scan()
+
+    def _schedule_scan(self):
+        if not self._scan_running and self._scan_source is None:
+            self._scan_source = GLib.timeout_add(
+                COALESCE_DELAY, self._on_scan_scheduled
+            )
+
+    def _on_scan_scheduled(self):
+        self._scan_source = None
+        if self._full_scan:
+            self.trigger_function(self._scan_filename)
+        elif self._dirty_paths:
+            self.check_files(self._dirty_paths)
+        return GLib.SOURCE_REMOVE
+
+    def trigger_function(self, filename):
+        """Check all attached files in the background.
+
+        Elements are indexed by the file they refer to, so every file is
+        checked once, however many elements point to it. Returns at once;
+        the outcome is applied on the main loop.
+        """
+        self._full_scan = False
+        self.rebuild_index(filename)
+        self.check_files(self._index)
+
+    def check_files(self, file_paths):
+        """Check ``file_paths`` in the background."""
+        index = {
+            file_path: list(self._index.get(file_path, ())) for file_path in file_paths
+        }
+        self._dirty_paths.clear()
+        if not index:
+            return
+
+        # Files whose stat tuple differs from all of these get hashed
+        recorded = None
+        if self.verify_content:
+            recorded = {
+                file_path: {
+                    (element.fileSize, element.fileMtimeNs)
+                    for element in elements
+                    if element.fileHash
+                }
+                for file_path, elements in index.items()
+            }
+        self._scan_running = True
+        submit(
+            "observer",
+            self.scan,
+            list(index),
+            recorded,
+            callback=lambda future: self._on_scan_done(index, future),
+        )
+
+    def record_hash(self, element):
+        """Store the content hash of the file ``element`` refers to, in the
+        background."""
+        file_path = self._resolve(element)
 
-            stored_last_modified = int(element.lastModified)
+        def on_hashed(future):
+            try:
+                mtime_ns, digest = future.result()
+            except OSError as e:
+                logger.warning(f"Could not hash file '{file_path}': {e}")
+                return
+            if (
+                self.element_factory.lookup(element.id) is element
+                and element.fileMtimeNs == mtime_ns
+            ):
+                with Transaction(self.event_manager):
+                    element.fileHash = digest
 
-            if file_path.exists():
-                # File exists, compare its modification time
-                actual_last_modified = int(file_path.stat().st_mtime)
+        def hash_current():
+            st = file_path.stat()
+            digest = hash_cache.digest(file_path, st)
+            hash_cache.save()
+            return st.st_mtime_ns, digest
 
-                if stored_last_modified != actual_last_modified:
-                    # If the file has been modified, enter a transaction and mark the element as modified
+        submit("observer", hash_current, callback=on_hashed)
+
+    def scan(self, file_paths, recorded=None):
+        """Stat all files, each with a timeout. Runs off the main thread.
+
+        Returns a dict with the ``FileState`` of every file, ``None`` for
+        missing files and ``TIMED_OUT`` for files that could not be checked
+        within ``STAT_TIMEOUT`` seconds. With ``recorded`` stat tuples per
+        path, files matching none of them also get a content hash.
+        """
+        results = {}
+        started = {}
+
+        def timed_stat(file_path):
+            started[file_path] = time.monotonic()
+            return stat_file(file_path)
+
+        # Every scan has its own threads, so checks hanging on a mount do not
+        # hold up later scans. Such a path is not checked again until its
+        # check returns, which bounds the number of threads stuck.
+        pool = ThreadPoolExecutor(
+            max_workers=STAT_WORKERS, thread_name_prefix="selt-observer-stat"
+        )
+        futures = {}
+        for file_path in file_paths:
+            if file_path in self._stats_running:
+                logger.warning(f"File '{file_path}' is still being checked.")
+                results[file_path] = TIMED_OUT
+                continue
+            self._stats_running.add(file_path)
+            future = pool.submit(timed_stat, file_path)
+            future.add_done_callback(
+                lambda _, file_path=file_path: self._stats_running.discard(file_path)
+            )
+            futures[future] = file_path
+        pool.shutdown(wait=False)
+
+        pending = set(futures)
+        hanging = 0
+        while pending:
+            now = time.monotonic()
+            for future in list(pending):
+                file_path = futures[future]
+                if now - started.get(file_path, now) >= STAT_TIMEOUT:
+                    logger.warning(f"Timed out checking file '{file_path}'.")
+                    results[file_path] = TIMED_OUT
+                    pending.discard(future)
+                    hanging += 1
+            if hanging >= STAT_WORKERS:
+                # No threads left for the files still queued
+                for future in pending:
+                    future.cancel()
+                    results[futures[future]] = TIMED_OUT
+                break
+            first_deadline = min(
+                (started[futures[f]] for f in pending if futures[f] in started),
+                default=now,
+            )
+            done, pending = wait(
+                pending,
+                timeout=max(first_deadline + STAT_TIMEOUT - now, 0),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                file_path = futures[future]
+                try:
+                    results[file_path] = future.result()
+                except OSError as e:
+                    logger.warning(f"Could not check file '{file_path}': {e}")
+
+        if recorded:
+            for file_path, state in results.items():
+                if (
+                    state
+                    and state is not TIMED_OUT
+                    and (state.size, state.mtime_ns) not in recorded[file_path]
+                ):
                     try:
-                        with Transaction(self.event_manager):
-                            element.modified = True
-                        logger.info(f"File '{file_path}' modified. Element updated.")
-                    except Exception as e:
-                        logger.error(
-                            f"Error updating element for file '{file_path}': {e}"
+                        results[file_path] = state._replace(
+                            digest=hash_cache.digest(file_path)
                         )
-            else:
+                    except OSError as e:
+                        logger.warning(f"Could not hash file '{file_path}': {e}")
+            hash_cache.save()
+        return results
+
+    def _on_scan_done(self, index, future):
+        self._scan_running = False
+        try:
+            self.apply_results(index, future.result())
+        except Exception as e:
+            logger.error(f"Error checking attached files: {e}")
+        if self._full_scan or self._dirty_paths:
+            self._schedule_scan()
+
+    def apply_results(self, index, results):
+        """Mark changed and missing files, in a single transaction. Files
+        that could not be checked are skipped. Runs on the main loop."""
+        changed = []
+        for file_path, state in results.items():
+            if state is None:
                 logger.warning(
                     f"File '{file_path}' not found. Marking element as modified."
                 )
+            elif state is TIMED_OUT:
+                # Whether it changed is unknown, so its elements keep their state
+                logger.warning(f"File '{file_path}' could not be checked. Skipping it.")
+                continue
+            for element in index[file_path]:
+                if self.element_factory.lookup(element.id) is not element:
+                    # Deleted while the scan was running
+                    continue
+                if element.modified:
+                    continue
+                if is_modified(element, state):
+                    changed.append(element)
 
-                try:
-                    with Transaction(self.event_manager):
-                        element.modified = True
-                except Exception as e:
-                    logger.error(
-                        f"Failed to update element for missing file '{file_path}': {e}"
-                    )
+        if not changed:
+            return
+
+        with Transaction(self.event_manager):
+            for element in changed:
+                element.modified = True
+        logger.info(f"{len(changed)} attached file(s) modified. Elements updated.")
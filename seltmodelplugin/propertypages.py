@@ -1,30 +1,51 @@
 from datetime import datetime
 from pathlib import Path
+import functools
 import logging
 import os
+from xml.etree import ElementTree as etree
 
-from gaphor.core import gettext
-from seltmodelplugin import c4model
-from gaphor.core import Transaction
+from gi.repository import Gtk
+
+from gaphor.core import Transaction, gettext
 from gaphor.diagram.propertypages import (
     NamePropertyPage,
     PropertyPageBase,
     PropertyPages,
     handler_blocking,
-    new_resource_builder,
     unsubscribe_all_on_destroy,
 )
 from gaphor.event import Notification
+from gaphor.i18n import translated_ui_string
 from gaphor.services.componentregistry import ComponentLookupError, ComponentRegistry
-from gaphor.transaction import Transaction
-from gaphor.ui.errorhandler import error_handler
 from gaphor.ui.filedialog import open_file_dialog
 from gaphor.ui.filemanager import FileManager
+from seltmodelplugin import c4model
+from seltmodelplugin.observer import ObserverService, file_metadata
 
 logger = logging.getLogger(__name__)
 
 
-new_builder = new_resource_builder("seltmodelplugin")
+@functools.cache
+def ui_template(object_ids):
+    """The part of ``propertypages.ui`` that defines ``object_ids``.
+
+    The UI file is translated and split once per process. A builder then
+    only parses the objects it creates, not the whole file, each time the
+    property pane is rebuilt.
+    """
+    root = etree.fromstring(translated_ui_string("seltmodelplugin", "propertypages.ui"))
+    template = etree.Element(root.tag, root.attrib)
+    for node in root:
+        if node.tag != "object" or node.get("id") in object_ids:
+            template.append(node)
+    return etree.tostring(template, encoding="unicode")
+
+
+def new_builder(*object_ids, signals=None):
+    builder = Gtk.Builder(signals)
+    builder.add_from_string(ui_template(object_ids))
+    return builder
 
 
 PropertyPages.register(c4model.C4Dependency, NamePropertyPage)
@@ -83,14 +104,15 @@ class FilePropertyPage(PropertyPageBase):
         self.component_registry = component_registry
         self.watcher = subject and subject.watcher()
         self.builder = None
+        self._metadata_path = None
 
+    @functools.cached_property
+    def model_dir(self):
         try:
             file_manager = self.component_registry.get(FileManager, "file_manager")
-            self.model_dir = (
-                file_manager.filename.parent if file_manager.filename else Path.cwd()
-            )
         except ComponentLookupError:
-            self.model_dir = Path.cwd()
+            return Path.cwd()
+        return file_manager.filename.parent if file_manager.filename else Path.cwd()
 
     def construct(self):
         subject = self.subject
@@ -107,45 +129,74 @@ class FilePropertyPage(PropertyPageBase):
             },
         )
 
+        self._update_labels()
+        self.watcher.watch("filePath", self._on_file_path_changed)
+
+        return unsubscribe_all_on_destroy(
+            self.builder.get_object("file-editor"), self.watcher
+        )
+
+    def _update_labels(self):
+        """Fill in the labels from the model. The state of the file itself
+        is read in the background and shown once known."""
         file_path_label = self.builder.get_object("file-path-label")
         last_modified_label = self.builder.get_object("last-modified-label")
         current_modified_label = self.builder.get_object("current-modified-label")
 
         try:
-            if self.subject:
-                file_path = self.subject.filePath
-            else:
-                file_path = None
+            file_path = self.subject.filePath
         except AttributeError as e:
             logger.error(f"Error accessing filePath: {e}")
             file_path = None
 
         if file_path:
-            file_path_label.set_text(file_path or "No file selected")
-
-            full_file_path = self.model_dir / file_path
-            if full_file_path.exists():
-                current_mtime = full_file_path.stat().st_mtime
-                current_modified_label.set_text(
-                    datetime.fromtimestamp(current_mtime).strftime("%Y-%m-%d %H:%M:%S")
-                )
-            else:
-                current_modified_label.set_text("File not found")
+            file_path_label.set_text(file_path)
 
             last_mtime = self.subject.lastModified
 
             if last_mtime:
-                last_modified_label.set_text(
-                    datetime.fromtimestamp(last_mtime).strftime("%Y-%m-%d %H:%M:%S")
-                )
+                last_modified_label.set_text(format_time(last_mtime))
             else:
                 last_modified_label.set_text("Unknown")
+
+            self._metadata_path = self._resolve(file_path)
+            if file_metadata.get(self._metadata_path) is None:
+                current_modified_label.set_text(gettext("Checking…"))
+                current_modified_label.set_tooltip_text(None)
+            file_metadata.request(
+                self._metadata_path,
+                functools.partial(self._on_metadata, self._metadata_path),
+            )
         else:
+            self._metadata_path = None
             file_path_label.set_text("No file selected")
             last_modified_label.set_text("")
             current_modified_label.set_text("")
+            current_modified_label.set_tooltip_text(None)
 
-        return self.builder.get_object("file-editor")
+    def _on_metadata(self, file_path, metadata):
+        # The page may show another file by now
+        if not self.builder or file_path != self._metadata_path:
+            return
+        current_modified_label = self.builder.get_object("current-modified-label")
+        if not metadata.exists:
+            current_modified_label.set_text("File not found")
+            current_modified_label.set_tooltip_text(None)
+            return
+        current_modified_label.set_text(format_time(metadata.mtime))
+        details = [gettext("{size} bytes").format(size=metadata.size)]
+        if metadata.dimensions:
+            width, height = metadata.dimensions
+            details.append(f"{width} × {height} px")
+        current_modified_label.set_tooltip_text(", ".join(details))
+
+    def _on_file_path_changed(self, event):
+        if event.old_value:
+            file_metadata.invalidate(self._resolve(event.old_value))
+        self._update_labels()
+
+    def _resolve(self, file_path):
+        return Path(os.path.normpath(self.model_dir / Path(file_path)))
 
     def _on_select_file_clicked(self, button):
         open_file_dialog(
@@ -162,21 +213,19 @@ class FilePropertyPage(PropertyPageBase):
         # Use the absolute path directly
         path = str(selected_file)
 
+        st = selected_file.stat()
+        # The same file may have been selected again, after it changed
+        file_metadata.invalidate(self._resolve(path))
         with Transaction(self.event_manager):
             self.subject.name = str(os.path.basename(path))
             self.subject.filePath = str(path)
-            self.subject.lastModified = int(selected_file.stat().st_mtime)
+            self.subject.lastModified = int(st.st_mtime)
+            self.subject.fileSize = st.st_size
+            self.subject.fileMtimeNs = st.st_mtime_ns
+        self._record_hash()
 
         if self.builder:
-            file_path_label = self.builder.get_object("file-path-label")
-            file_path_label.set_text(self.subject.filePath)
-
-            last_modified_label = self.builder.get_object("last-modified-label")
-            last_modified_label.set_text(
-                datetime.fromtimestamp(self.subject.lastModified).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                )
-            )
+            self._update_labels()
 
     def _on_update_changes_clicked(self, button):
         try:
@@ -184,18 +233,14 @@ class FilePropertyPage(PropertyPageBase):
                 file_path = Path(self.subject.filePath)
                 file_path = self.model_dir / file_path
 
-                self.subject.lastModified = int(file_path.stat().st_mtime)
+                st = file_path.stat()
+                self.subject.lastModified = int(st.st_mtime)
+                self.subject.fileSize = st.st_size
+                self.subject.fileMtimeNs = st.st_mtime_ns
 
                 if self.subject:
                     self.subject.modified = False
 
-                if self.builder:
-                    last_modified_label = self.builder.get_object("last-modified-label")
-                    last_modified_label.set_text(
-                        datetime.fromtimestamp(self.subject.lastModified).strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        )
-                    )
         except (FileNotFoundError, OSError) as e:
             logger.error(f"File '{file_path}' not found or cannot be accessed: {e}")
 
@@ -204,6 +249,21 @@ class FilePropertyPage(PropertyPageBase):
                     gettext(f"The system cannot find the file specified:\n{file_path}\n")
                 )
             )
+            return
+
+        file_metadata.invalidate(self._resolve(self.subject.filePath))
+        if self.builder:
+            self._update_labels()
+        self._record_hash()
+
+    def _record_hash(self):
+        """Let the observer store the file's content hash, for content
+        verification."""
+        try:
+            observer = self.component_registry.get(ObserverService, "observer")
+        except ComponentLookupError:
+            return
+        observer.record_hash(self.subject)
 
     def _on_show_in_explorer_clicked(self, button):
         if self.subject.filePath:
@@ -211,6 +271,10 @@ class FilePropertyPage(PropertyPageBase):
             open_file_in_explorer(absolute_file_path)
 
 
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
 def open_file_in_explorer(file_path):
     import platform
     import subprocess
@@ -0,0 +1,9 @@
+# ruff: noqa: F401
+
+from seltmodelplugin.spatial.index import (
+    SpatialIndex,
+    SpatialItem,
+    diagram_index,
+    item_bounds,
+)
+from seltmodelplugin.spatial.routing import route_orthogonal
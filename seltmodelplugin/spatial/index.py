@@ -0,0 +1,155 @@
+"""Spatial index of the SELT items on a diagram.
+
+Bounding boxes are kept in diagram coordinates in a quadtree, so point and
+region queries only look at the items near the query, not at every item
+on the diagram. Items report moves and resizes, which update the tree
+incrementally.
+
+Routed lines register the area their route covers. When an item moves
+into or out of that area, the route is marked stale and the line is asked
+to update.
+"""
+
+import weakref
+
+from gaphas.geometry import rectangle_contains
+from gaphas.quadtree import Quadtree
+
+# The tree grows in steps of this many units when items are placed outside
+RESIZE_STEP = 1000
+
+
+def item_bounds(item):
+    """Bounding box ``(x, y, width, height)`` of an element item, in
+    diagram coordinates."""
+    transform = item.matrix_i2c.transform_point
+    xs, ys = zip(
+        *(
+            transform(x, y)
+            for x in (0, item.width)
+            for y in (0, item.height)
+        ),
+        strict=True,
+    )
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+def _area(bounds):
+    return bounds[2] * bounds[3]
+
+
+class SpatialIndex:
+    """Bounding boxes of the items on one diagram."""
+
+    def __init__(self):
+        self._tree = Quadtree(resize_step=RESIZE_STEP)
+        self._routes = Quadtree(resize_step=RESIZE_STEP)
+        self._stale_routes = set()
+
+    def update(self, item):
+        """Store the current bounds of ``item``."""
+        tree = self._tree
+        bounds = item_bounds(item)
+        if item in tree:
+            old_bounds = tree.get_bounds(item)
+            if old_bounds == bounds:
+                return
+            self._invalidate_routes(old_bounds)
+        tree.add(item, bounds)
+        self._invalidate_routes(bounds)
+
+    def remove(self, item):
+        if item in self._tree:
+            self._invalidate_routes(self._tree.get_bounds(item))
+            self._tree.remove(item)
+
+    def __len__(self):
+        return len(self._tree)
+
+    def __contains__(self, item):
+        return item in self._tree
+
+    def bounds(self, item):
+        return self._tree.get_bounds(item)
+
+    def items_at(self, x, y):
+        """Items containing the point ``(x, y)``, innermost first."""
+        tree = self._tree
+        return sorted(
+            (
+                item
+                for item in tree.find_intersect((x, y, 0, 0))
+                if rectangle_contains((x, y, 0, 0), tree.get_bounds(item))
+            ),
+            key=lambda item: _area(tree.get_bounds(item)),
+        )
+
+    def items_in(self, rect):
+        """Items that lie entirely within ``rect``."""
+        return self._tree.find_inside(rect)
+
+    def items_intersecting(self, rect):
+        """Items that overlap ``rect``."""
+        return self._tree.find_intersect(rect)
+
+    def set_route(self, line, bounds):
+        """Register the area covered by the route of ``line``."""
+        self._routes.add(line, bounds)
+        self._stale_routes.discard(line)
+
+    def remove_route(self, line):
+        # Lines that were never routed are not in the tree
+        if line in self._routes:
+            self._routes.remove(line)
+        self._stale_routes.discard(line)
+
+    def is_stale(self, line):
+        """Whether an item moved into or out of the route of ``line``."""
+        return line in self._stale_routes
+
+    def _invalidate_routes(self, bounds):
+        for line in self._routes.find_intersect(bounds):
+            if line not in self._stale_routes:
+                self._stale_routes.add(line)
+                line.request_update()
+
+
+_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def diagram_index(diagram):
+    """The ``SpatialIndex`` of ``diagram``, created on first use."""
+    index = _indexes.get(diagram)
+    if index is None:
+        index = _indexes[diagram] = SpatialIndex()
+    return index
+
+
+class SpatialItem:
+    """Mixin for element items that keeps their bounds in the spatial index
+    of their diagram."""
+
+    def __init__(self, diagram, id=None, **kwargs):
+        super().__init__(diagram, id, **kwargs)
+        self._spatial_index = diagram_index(diagram)
+        self._spatial_index.update(self)
+
+    def _on_matrix_changed(self, matrix, old_value):
+        # Also called when a parent moves
+        super()._on_matrix_changed(matrix, old_value)
+        self._on_bounds_changed()
+
+    def _on_handle_position_update(self, position, old):
+        super()._on_handle_position_update(position, old)
+        self._on_bounds_changed()
+
+    def _on_bounds_changed(self):
+        # Handles move while the item is constructed, before it is indexed
+        if index := getattr(self, "_spatial_index", None):
+            index.update(self)
+
+    def inner_unlink(self, unlink_event):
+        if index := getattr(self, "_spatial_index", None):
+            index.remove(self)
+            self._spatial_index = None
+        super().inner_unlink(unlink_event)
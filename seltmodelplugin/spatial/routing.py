@@ -0,0 +1,96 @@
+"""Orthogonal routes around the items of a spatial index.
+
+A route is a list of points, the ends included, with alternating
+horizontal and vertical segments. Candidate routes bend at the centre
+between the ends, or just outside the items near them; the shortest one
+with the fewest bends that does not cross an item is taken. Only the index
+is queried, so the cost depends on the number of items near the route.
+"""
+
+# Distance kept between a route and the items it passes
+MARGIN = 10
+
+# How far around the ends items are looked up for bend positions
+SEARCH_MARGIN = 100
+
+# Bend positions tried per axis, nearest to the centre first
+MAX_CANDIDATES = 8
+
+# A bend costs as much as this much extra length
+BEND_COST = 20
+
+
+def route_orthogonal(index, start, end, horizontal=True, exclude=()):
+    """Route from ``start`` to ``end``, in diagram coordinates.
+
+    The first segment is horizontal if ``horizontal``, else vertical.
+    Items in ``exclude`` and items containing either end, like the
+    containers the ends are nested in, are not avoided.
+    """
+    exclude = {*exclude, *index.items_at(*start), *index.items_at(*end)}
+
+    def obstacles(rect):
+        return [
+            index.bounds(item)
+            for item in index.items_intersecting(rect)
+            if item not in exclude
+        ]
+
+    if horizontal:
+        return _route(start, end, obstacles)
+
+    def transposed(rect):
+        x, y, width, height = rect
+        return [(oy, ox, oh, ow) for ox, oy, ow, oh in obstacles((y, x, height, width))]
+
+    return [(y, x) for x, y in _route((start[1], start[0]), (end[1], end[0]), transposed)]
+
+
+def _route(start, end, obstacles):
+    """Route starting with a horizontal segment."""
+    (x0, y0), (x1, y1) = start, end
+    nearby = obstacles(
+        (
+            min(x0, x1) - SEARCH_MARGIN,
+            min(y0, y1) - SEARCH_MARGIN,
+            abs(x1 - x0) + 2 * SEARCH_MARGIN,
+            abs(y1 - y0) + 2 * SEARCH_MARGIN,
+        )
+    )
+    xs = _candidates(
+        (x0 + x1) / 2,
+        (edge for x, _, w, _ in nearby for edge in (x - MARGIN, x + w + MARGIN)),
+    )
+    ys = _candidates(
+        (y0 + y1) / 2,
+        (edge for _, y, _, h in nearby for edge in (y - MARGIN, y + h + MARGIN)),
+    )
+
+    routes = [[start, (x1, y0), end]]
+    routes.extend([start, (x, y0), (x, y1), end] for x in xs)
+    routes.extend([start, (x, y0), (x, y), (x1, y), end] for x in xs for y in ys)
+    routes.sort(key=_cost)
+
+    for route in routes:
+        if not any(
+            obstacles(_segment_rect(p, q))
+            for p, q in zip(route, route[1:], strict=False)
+        ):
+            return route
+    return routes[0]
+
+
+def _candidates(centre, edges):
+    return sorted({centre, *edges}, key=lambda v: abs(v - centre))[:MAX_CANDIDATES]
+
+
+def _cost(route):
+    length = sum(
+        abs(q[0] - p[0]) + abs(q[1] - p[1])
+        for p, q in zip(route, route[1:], strict=False)
+    )
+    return length + BEND_COST * (len(route) - 2)
+
+
+def _segment_rect(p, q):
+    return min(p[0], q[0]), min(p[1], q[1]), abs(q[0] - p[0]), abs(q[1] - p[1])
@@ -0,0 +1,129 @@
+"""
+The export backend, as functions of a ``ModelIndex``.
+
+Nothing here needs the user interface, so the same export runs in Gaphor
+and from the command line.
+"""
+
+from seltmodelplugin.modelindex import CONTAINER_TYPES
+from seltmodelplugin.tableexport.writers import (
+    TABLE_WRITERS,
+    encode_json,
+    iter_json_fragments,
+    write_json,
+)
+
+JSON_INDENT = 4
+
+ELEMENT_COLUMNS = ("Elem. name", "desc.", "type", "connected as parent")
+
+EDGE_COLUMNS = ("source", "target", "connection")
+
+
+def element_data(index, e):
+    """
+    The exported data of one element.
+    """
+    children = index.nested_packages(e) + index.owned_containers(e)
+    return {
+        "Elem. name" : e.name,
+        "desc.": e.description if e.description else "",
+        "type": e.type,
+        "connected as parent": [child.name for child in children],
+        "connected as target": [
+            {"name": dependency.client.name, "connection": dependency.name or ""}
+            for dependency in index.supplier_dependencies(e)
+            if dependency.client
+        ],
+        "connected as source": [
+            {"name": dependency.supplier.name, "connection": dependency.name or ""}
+            for dependency in index.client_dependencies(e)
+            if dependency.supplier
+        ],
+        }
+
+
+def iter_elements(index):
+    """
+    Produce the exported elements one at a time, so they can be written as
+    they are produced.
+
+    Yields
+    ------
+    dict
+        The data of one element.
+    """
+    for e in index.select(*CONTAINER_TYPES):
+        yield element_data(index, e)
+
+
+def iter_fragments(index, indent=JSON_INDENT, fragments=None):
+    """
+    Produce the exported elements encoded as JSON. With a ``FragmentCache``,
+    elements that did not change since the last export are taken from it.
+    """
+    def encode(e):
+        return encode_json(element_data(index, e), indent)
+
+    for e in index.select(*CONTAINER_TYPES):
+        if fragments is not None:
+            yield fragments.get(e, indent, encode)
+        else:
+            yield encode(e)
+
+
+def iter_table(elements):
+    """
+    Flatten the exported elements into rows of an element table and an
+    edge table, in a single pass.
+
+    Yields
+    ------
+    (bool, tuple)
+        Whether the row is an edge, and the row itself.
+    """
+    for element in elements:
+        yield False, (
+            element["Elem. name"],
+            element["desc."],
+            element["type"],
+            "; ".join(name or "" for name in element["connected as parent"]),
+        )
+        for source in element["connected as source"]:
+            yield True, (element["Elem. name"], source["name"], source["connection"])
+
+
+def export_json(index, indent=JSON_INDENT, fragments=None):
+    """
+    Produce the JSON document of the model, in chunks.
+    """
+    return iter_json_fragments(iter_fragments(index, indent, fragments), indent)
+
+
+def write_model_json(index, file_path, indent=JSON_INDENT, compress=False, fragments=None):
+    """
+    Write the JSON document of the model to ``file_path``.
+    """
+    write_json(
+        file_path,
+        iter_fragments(index, indent, fragments),
+        indent=indent,
+        compress=compress,
+        encoded=True,
+    )
+
+
+def write_model_table(index, fmt, file_path):
+    """
+    Write the element and edge tables in CSV, XLSX or TXT format, as the
+    rows are produced.
+
+    CSV and TXT exports write the edge table to a second file, next to
+    file_path; XLSX exports put it on a second sheet.
+    """
+    with TABLE_WRITERS[fmt](file_path, ELEMENT_COLUMNS, EDGE_COLUMNS) as writer:
+        for is_edge, row in iter_table(iter_elements(index)):
+            if is_edge:
+                writer.write_edge(row)
+            else:
+                writer.write_element(row)
@@ -0,0 +1,190 @@
+"""
+Export .gaphor models from the command line, without a display.
+
+    seltmodel-export model.gaphor                  JSON on stdout
+    seltmodel-export -f csv -o out.csv model.gaphor
+    seltmodel-export -f xlsx -o exports/ *.gaphor  one file per model
+    seltmodel-export --stream big.gaphor           without loading the model
+
+Several models are exported in parallel, each in its own process.
+"""
+
+import argparse
+import csv
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from seltmodelplugin.tableexport import backend
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("json", "csv", "txt", "xlsx")
+
+
+def load_model(model_file):
+    """
+    Load a model without the user interface.
+
+    Returns
+    -------
+    ModelIndex
+        The index of the loaded model.
+    """
+    from gaphor.core.eventmanager import EventManager
+    from gaphor.core.modeling import ElementFactory
+    from gaphor.services.modelinglanguage import ModelingLanguageService
+    from gaphor.storage import storage
+
+    from seltmodelplugin.modelindex import ModelIndex
+
+    event_manager = EventManager()
+    element_factory = ElementFactory(event_manager)
+    modeling_language = ModelingLanguageService()
+    model_index = ModelIndex(event_manager, element_factory)
+    with open(model_file, encoding="utf-8") as file_obj:
+        storage.load(file_obj, element_factory, modeling_language)
+    # Loading does not emit events
+    model_index.rebuild()
+    return model_index
+
+
+def read_index(model_file, stream=False):
+    """
+    The index of a model, either loaded in full or, with stream, read
+    directly from the file.
+    """
+    if stream:
+        from seltmodelplugin.tableexport.reader import read_model
+
+        return read_model(model_file)
+    return load_model(model_file)
+
+
+def export_model(model_file, fmt, output, indent=backend.JSON_INDENT, stream=False):
+    """
+    Export one model to the file output. Runs in a worker process.
+    """
+    index = read_index(model_file, stream)
+    if fmt == "json":
+        backend.write_model_json(
+            index, output, indent=indent, compress=Path(output).suffix == ".gz"
+        )
+    else:
+        backend.write_model_table(index, fmt, output)
+    return output
+
+
+def write_stdout(
+    model_file, fmt, indent=backend.JSON_INDENT, edges=False, stream=False
+):
+    """
+    Write the export of one model to stdout.
+    """
+    index = read_index(model_file, stream)
+    out = sys.stdout
+    if fmt == "json":
+        for chunk in backend.export_json(index, indent):
+            out.write(chunk)
+        out.write("\n")
+        return
+
+    writer = csv.writer(out, dialect="excel-tab" if fmt == "txt" else "excel")
+    writer.writerow(backend.EDGE_COLUMNS if edges else backend.ELEMENT_COLUMNS)
+    for is_edge, row in backend.iter_table(backend.iter_elements(index)):
+        if is_edge == edges:
+            writer.writerow(row)
+
+
+def output_path(model_file, fmt, output):
+    """
+    The file the export of model_file is written to: output itself, or a
+    file named after the model in directory output, or next to the model.
+    """
+    model_file = Path(model_file)
+    if output is None:
+        return model_file.with_suffix(f".{fmt}")
+    output = Path(output)
+    if output.is_dir():
+        return output / model_file.with_suffix(f".{fmt}").name
+    return output
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="seltmodel-export",
+        description="Export Gaphor models to JSON, CSV, TXT or XLSX tables.",
+    )
+    parser.add_argument("models", nargs="+", type=Path, help="the .gaphor files")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="json")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="output file, or directory for several models; "
+        "stdout for a single model if omitted",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of models exported in parallel",
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="write json without indentation"
+    )
+    parser.add_argument(
+        "--edges",
+        action="store_true",
+        help="write the edge table instead of the element table to stdout",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="read the exported elements straight from the file, "
+        "without loading the model",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    indent = None if args.compact else backend.JSON_INDENT
+
+    if len(args.models) == 1 and args.output is None:
+        if args.format == "xlsx":
+            sys.exit("seltmodel-export: xlsx needs an output file (-o)")
+        write_stdout(args.models[0], args.format, indent, args.edges, args.stream)
+        return 0
+
+    if len(args.models) > 1 and args.output and not Path(args.output).is_dir():
+        sys.exit("seltmodel-export: -o must be a directory for several models")
+
+    jobs = max(1, min(args.jobs or 1, len(args.models)))
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                export_model,
+                model_file,
+                args.format,
+                output_path(model_file, args.format, args.output),
+                indent,
+                args.stream,
+            ): model_file
+            for model_file in args.models
+        }
+        for future in as_completed(futures):
+            try:
+                print(future.result())
+            except Exception as e:
+                failed += 1
+                logger.error(f"Could not export '{futures[future]}': {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
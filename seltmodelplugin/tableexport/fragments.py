@@ -0,0 +1,95 @@
+"""
+Cache of the serialized fragments of exported elements.
+"""
+
+from gaphor.core.eventmanager import event_handler
+from gaphor.core.modeling import Element
+from gaphor.core.modeling.coremodel import Dependency
+from gaphor.core.modeling.event import (
+    ElementDeleted,
+    ElementUpdated,
+    ModelFlushed,
+    ModelReady,
+)
+
+
+class FragmentCache:
+    """
+    The encoded fragment of every exported element, per indentation.
+
+    A fragment holds the names of connected elements too, so a change to an
+    element also drops the fragments of the elements it is connected to.
+
+    Methods
+    -------
+    get(self, element, indent, encode)
+        The fragment of element, encoded by encode(element) if not cached.
+    invalidate(self, element)
+        Drop the fragments of element and its neighbours.
+    """
+
+    def __init__(self, event_manager, model_index):
+        self.event_manager = event_manager
+        self.model_index = model_index
+        self._fragments: dict[Element, dict[int | None, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.event_manager.subscribe(self.on_element_updated)
+        self.event_manager.subscribe(self.on_element_deleted)
+        self.event_manager.subscribe(self.on_model_changed)
+
+    def shutdown(self):
+        self.event_manager.unsubscribe(self.on_element_updated)
+        self.event_manager.unsubscribe(self.on_element_deleted)
+        self.event_manager.unsubscribe(self.on_model_changed)
+
+    def get(self, element, indent, encode):
+        fragments = self._fragments.setdefault(element, {})
+        fragment = fragments.get(indent)
+        if fragment is None:
+            self.misses += 1
+            fragment = fragments[indent] = encode(element)
+        else:
+            self.hits += 1
+        return fragment
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def invalidate(self, element):
+        if not isinstance(element, Element):
+            return
+        self._drop(element)
+        index = self.model_index
+        if isinstance(element, Dependency):
+            self._drop(element.client)
+            self._drop(element.supplier)
+        for dependency in index.client_dependencies(element):
+            self._drop(dependency.supplier)
+        for dependency in index.supplier_dependencies(element):
+            self._drop(dependency.client)
+        self._drop(index.nesting.parent(element))
+        self._drop(index.containment.parent(element))
+
+    def clear(self):
+        self._fragments.clear()
+
+    @event_handler(ElementUpdated)
+    def on_element_updated(self, event: ElementUpdated) -> None:
+        self.invalidate(event.element)
+        # Elements an association was set to or removed from
+        self.invalidate(getattr(event, "old_value", None))
+        self.invalidate(getattr(event, "new_value", None))
+
+    @event_handler(ElementDeleted)
+    def on_element_deleted(self, event: ElementDeleted) -> None:
+        self.invalidate(event.element)
+        self._fragments.pop(event.element, None)
+
+    @event_handler(ModelReady, ModelFlushed)
+    def on_model_changed(self, event) -> None:
+        self.clear()
+
+    def _drop(self, element):
+        if element is not None:
+            self._fragments.pop(element, None)
@@ -0,0 +1,184 @@
+"""
+Read the exported elements straight from a .gaphor file.
+
+The file is parsed incrementally and only the model elements the export
+needs are kept; diagrams and their items are skipped and every parsed
+element is dropped once read. The result answers the same queries as a
+``ModelIndex`` of the fully loaded model, in the same order, so the export
+backend produces identical output from either.
+"""
+
+import functools
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+
+# Element properties the export reads
+VALUES = {"name", "description", "type"}
+REFERENCES = {
+    "package",
+    "nestedPackage",
+    "ownerContainer",
+    "owningContainer",
+    "client",
+    "supplier",
+}
+
+
+class ElementRecord:
+    """The exported properties of one model element."""
+
+    __slots__ = ("id", "cls", "name", "description", "type", "client", "supplier")
+
+    def __init__(self, id, cls):
+        self.id = id
+        self.cls = cls
+        self.name = None
+        self.description = None
+        self.type = None
+        self.client = None
+        self.supplier = None
+
+
+@functools.cache
+def _modeling_language():
+    from gaphor.services.modelinglanguage import ModelingLanguageService
+
+    return ModelingLanguageService()
+
+
+def lookup_element(name):
+    """The model class of element type ``name``, from all installed modeling
+    languages."""
+    return _modeling_language().lookup_element(name)
+
+
+class StreamIndex:
+    """
+    The subset of ``ModelIndex`` queries used by the export backend, over
+    element records read from a file.
+
+    Elements are in file order, which is also the order a full load
+    creates them in.
+    """
+
+    def __init__(self):
+        self._elements: list[ElementRecord] = []
+        self._client_dependencies = defaultdict(list)
+        self._supplier_dependencies = defaultdict(list)
+        # Children in the order loading the model adds them in
+        self._nested_packages = defaultdict(dict)
+        self._owned_containers = defaultdict(dict)
+
+    def select(self, *types):
+        return (e for e in self._elements if issubclass(e.cls, types))
+
+    def client_dependencies(self, element):
+        return list(self._client_dependencies.get(element, ()))
+
+    def supplier_dependencies(self, element):
+        return list(self._supplier_dependencies.get(element, ()))
+
+    def nested_packages(self, element):
+        return list(self._nested_packages.get(element, ()))
+
+    def owned_containers(self, element):
+        return list(self._owned_containers.get(element, ()))
+
+
+def read_model(source, lookup=lookup_element):
+    """
+    Read the elements of a .gaphor file needed for the export.
+
+    Parameters
+    ----------
+    source : str or file
+        The model file.
+    lookup : callable
+        Maps element type names to model classes.
+
+    Returns
+    -------
+    StreamIndex
+        The exported elements and their connections.
+    """
+    from gaphor.core.modeling import Element, Presentation
+    from gaphor.core.modeling.coremodel import Dependency
+    from gaphor.UML.uml import Package
+
+    from seltmodelplugin.modelindex import CONTAINER_TYPES
+
+    @functools.cache
+    def kind(tag):
+        cls = lookup(tag)
+        if cls is None or not issubclass(cls, Element) or issubclass(cls, Presentation):
+            return None
+        return cls
+
+    index = StreamIndex()
+    records = {}
+    # (record, property name, referenced id), resolved once all ids are known
+    references = []
+
+    depth = 0
+    record = None
+    prop = None
+    context = ET.iterparse(source, events=("start", "end"))
+    _, root = next(context)
+    for event, node in context:
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                cls = kind(_local(node.tag))
+                record = ElementRecord(node.get("id"), cls) if cls else None
+            elif depth == 2 and record:
+                prop = _local(node.tag)
+            elif depth in (3, 4) and record and prop in REFERENCES:
+                # Single references are a <ref> of their own, collections
+                # a <reflist> of them
+                if _local(node.tag) == "ref":
+                    references.append((record, prop, node.get("refid")))
+            continue
+
+        if depth == 3 and record and prop in VALUES and _local(node.tag) == "val":
+            setattr(record, prop, node.text or "")
+        elif depth == 1:
+            if record:
+                records[record.id] = record
+                index._elements.append(record)
+            record = None
+            root.clear()
+        depth -= 1
+
+    # References are resolved in file order, like loading the model does,
+    # so children end up in the order of the loaded model, from whichever
+    # end of the association is read first
+    for record, prop, refid in references:
+        target = records.get(refid)
+        if target is None:
+            continue
+        if prop == "client" and issubclass(record.cls, Dependency):
+            record.client = target
+        elif prop == "supplier" and issubclass(record.cls, Dependency):
+            record.supplier = target
+        elif prop == "package" and issubclass(record.cls, Package):
+            if issubclass(target.cls, Package):
+                index._nested_packages[target][record] = None
+        elif prop == "nestedPackage" and issubclass(record.cls, Package):
+            if issubclass(target.cls, Package):
+                index._nested_packages[record][target] = None
+        elif prop == "ownerContainer" and issubclass(record.cls, CONTAINER_TYPES):
+            index._owned_containers[target][record] = None
+        elif prop == "owningContainer" and issubclass(record.cls, CONTAINER_TYPES):
+            index._owned_containers[record][target] = None
+
+    # Connections are listed in the order the dependencies appear in
+    for record in index._elements:
+        if record.client:
+            index._client_dependencies[record.client].append(record)
+        if record.supplier:
+            index._supplier_dependencies[record.supplier].append(record)
+    return index
+
+
+def _local(tag):
+    return tag.rpartition("}")[2]
@@ -1,19 +1,34 @@
-import json
+import functools
+import logging
 from pathlib import Path
-from collections import defaultdict
 
 
 
-from gaphor.C4Model import c4model
 from gaphor.abc import ActionProvider, Service
 from gaphor.core import action, gettext
+from gaphor.core.eventmanager import event_handler
+from gaphor.event import ModelSaved
 from gaphor.ui.filedialog import save_file_dialog
+from seltmodelplugin.background import submit
+from seltmodelplugin.tableexport import backend
+from seltmodelplugin.tableexport.backend import JSON_INDENT
+from seltmodelplugin.tableexport.fragments import FragmentCache
+from seltmodelplugin.tableexport.writers import open_atomic, write_json
+
+logger = logging.getLogger(__name__)
 
 
 DEBUG = True
 
 JSON_FILTER = [(gettext("JSON files"), "*.json", "application/json")]
 
+TABLE_MIME_TYPES = {
+    "csv": "text/csv",
+    "txt": "text/plain",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
 
 class TableExporter(Service, ActionProvider):
     """
@@ -22,15 +37,28 @@ class TableExporter(Service, ActionProvider):
 
     Methods
     -------
-    __init__(self, tools_menu=None, main_window=None, element_factory=None)
+    __init__(self, tools_menu=None, main_window=None, element_factory=None, model_index=None, event_manager=None)
         Default method - initialize the exporting tool.
     shutdown(self)
         Default method - shutdown the tool
     save_dialog(self, data, title, ext, mime_type, handler)
         Launch the export dialog.
+    iter_elements(self)
+        Produce the exported elements one by one.
+    iter_fragments(self, indent)
+        Produce the encoded elements, from the fragment cache.
+    save_table(self, fmt, file_path)
+        Write the element and edge tables in CSV, XLSX or TXT format.
     """
 
-    def __init__(self, tools_menu=None, main_window=None, element_factory=None):
+    def __init__(
+        self,
+        tools_menu=None,
+        main_window=None,
+        element_factory=None,
+        model_index=None,
+        event_manager=None,
+    ):
         """
         The class builder
 
@@ -42,20 +70,66 @@ class TableExporter(Service, ActionProvider):
             The main window of the program.
         element_factory=None
             The element factory of the exporting diagram.
+        model_index=None
+            The index used to look up elements and their connections.
+        event_manager=None
+            The event manager, used to keep the fragment cache up to date
+            and to export on save.
         """
 
         self.tools_menu = tools_menu
-        tools_menu.add_actions(self)
+        if tools_menu:
+            tools_menu.add_actions(self)
         self.main_window = main_window
         self.element_factory = element_factory
+        self.model_index = model_index
         self.filename: Path = Path("export").absolute()
+        self.compact = False
+        self.compress = False
+        self.auto_export = False
+        self.event_manager = event_manager
+        self.fragments = None
+        if event_manager:
+            self.fragments = FragmentCache(event_manager, model_index)
+            event_manager.subscribe(self.on_model_saved)
 
 
     def shutdown(self):
         """
         Default function to shutdown the plugin.
         """
-        self.tools_menu.remove_actions(self)
+        if self.tools_menu:
+            self.tools_menu.remove_actions(self)
+        if self.event_manager:
+            self.fragments.shutdown()
+            self.event_manager.unsubscribe(self.on_model_saved)
+
+    @event_handler(ModelSaved)
+    def on_model_saved(self, event: ModelSaved) -> None:
+        """
+        Write the export next to the saved model, if auto export is on.
+        """
+        if not self.auto_export or not event.filename:
+            return
+        file_path = Path(event.filename).with_suffix(".json")
+        indent = None if self.compact else JSON_INDENT
+        # Elements are only read on the main thread; the file is written
+        # in the background
+        fragments = list(self.iter_fragments(indent))
+
+        def on_written(future):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Could not export model to '{file_path}': {e}")
+
+        submit(
+            "tableexport",
+            functools.partial(write_json, indent=indent, encoded=True),
+            file_path,
+            fragments,
+            callback=on_written,
+        )
 
     def save_dialog(self, data, title, ext, mime_type, handler):
         """
@@ -79,6 +153,25 @@ class TableExporter(Service, ActionProvider):
             ],
         )
 
+    def iter_elements(self):
+        """
+        Produce the exported elements one at a time, so they can be written
+        as they are produced.
+
+        Yields
+        ------
+        dict
+            The data of one element.
+        """
+        return backend.iter_elements(self.model_index)
+
+    def iter_fragments(self, indent):
+        """
+        Produce the exported elements encoded as JSON. Elements that did not
+        change since the last export are taken from the fragment cache.
+        """
+        return backend.iter_fragments(self.model_index, indent, self.fragments)
+
     def _export_backend(self) -> str:
         """
         The main function, which converts the diagram to the json.
@@ -89,32 +182,9 @@ class TableExporter(Service, ActionProvider):
             A json str with all model data.
         """
 
-        # init dictionary
-        elements_connections = defaultdict(lambda: {"sources" : [], "targets" : []})
-
-        
-        for dependency in self.element_factory.select(c4model.Dependency):
-            src = dependency.client
-            tgt = dependency.supplier
-            connection_name = dependency.name if dependency.name else ""
-            elements_connections[src]["sources"].append({"name": tgt.name, "connection": connection_name})
-            elements_connections[tgt]["targets"].append({"name": src.name, "connection": connection_name})
-
-
-
-        elements = []
-        for e in self.element_factory.select(c4model.C4Container):
-            elements.append({
-                "Elem. name" : e.name,
-                "desc.": e.description if e.description else "",
-                "type": e.type,
-                "connected as parent":[child.name for child in e.nestedPackage] if e.nestedPackage else [],
-                "connected as target": elements_connections[e]["targets"],
-                "connected as source": elements_connections[e]["sources"]
-                })
-
-
-        return json.dumps(elements, indent = 4)
+        return "".join(
+            backend.export_json(self.model_index, JSON_INDENT, self.fragments)
+        )
 
     @action(
         name="tableexporter",
@@ -125,18 +195,104 @@ class TableExporter(Service, ActionProvider):
         """
         Handles saving 
         """
-        data = self._export_backend()
+        ext = "json.gz" if self.compress else "json"
+        mime_type = "application/gzip" if self.compress else "application/json"
+        self.save_dialog(
+            None, gettext("Export model as json"), ext, mime_type, self.save_json
+        )
+
+    @action(
+        name="tableexporter-compact",
+        label=gettext("Compact json export"),
+        tooltip=gettext("Export json without indentation"),
+        state=False,
+    )
+    def compact_action(self, active):
+        self.compact = active
+
+    @action(
+        name="tableexporter-compress",
+        label=gettext("Compress json export"),
+        tooltip=gettext("Export gzip compressed json"),
+        state=False,
+    )
+    def compress_action(self, active):
+        self.compress = active
+
+    @action(
+        name="tableexporter-auto-export",
+        label=gettext("Export json on save"),
+        tooltip=gettext("Write the json export next to the model every time it is saved"),
+        state=False,
+    )
+    def auto_export_action(self, active):
+        self.auto_export = active
+
+    @action(
+        name="tableexporter-csv",
+        label=gettext("Export diagram to CSV"),
+        tooltip=gettext("Export all the model to CSV tables"),
+    )
+    def save_csv_action(self):
+        self.save_table_dialog("csv")
+
+    @action(
+        name="tableexporter-xlsx",
+        label=gettext("Export diagram to XLSX"),
+        tooltip=gettext("Export all the model to an XLSX workbook"),
+    )
+    def save_xlsx_action(self):
+        self.save_table_dialog("xlsx")
+
+    @action(
+        name="tableexporter-txt",
+        label=gettext("Export diagram to TXT"),
+        tooltip=gettext("Export all the model to tab separated text tables"),
+    )
+    def save_txt_action(self):
+        self.save_table_dialog("txt")
+
+    def save_table_dialog(self, fmt):
         self.save_dialog(
-            data, gettext("Export model as json"), "json", "application/json", self.save_json
+            None,
+            gettext("Export model as {fmt}").format(fmt=fmt.upper()),
+            fmt,
+            TABLE_MIME_TYPES[fmt],
+            lambda file_path, data: self.save_table(fmt, file_path),
         )
 
-    def save_json(self, file_path,data):
+    def save_table(self, fmt, file_path):
+        """
+        Write the element and edge tables, as the rows are produced.
+
+        CSV and TXT exports write the edge table to a second file, next to
+        file_path; XLSX exports put it on a second sheet.
         """
-        Writes the json data into file
+        try:
+            backend.write_model_table(self.model_index, fmt, file_path)
+        except Exception as e:
+            raise TypeError(f"Error saving file: {e}")
+
+    def save_json(self, file_path, data=None):
+        """
+        Writes the json data into file. Without data, the model is streamed
+        to the file element by element.
+
+        The file is written to a temporary file first, which replaces
+        file_path once complete.
         """
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(data)
+            compress = Path(file_path).suffix == ".gz"
+            if data is not None:
+                with open_atomic(file_path, compress=compress) as f:
+                    f.write(data)
+                return
+            backend.write_model_json(
+                self.model_index,
+                file_path,
+                indent=None if self.compact else JSON_INDENT,
+                compress=compress,
+                fragments=self.fragments,
+            )
         except Exception as e:
             raise TypeError(f"Error saving file: {e}")
-  
@@ -0,0 +1,360 @@
+"""
+Streaming writers for the table export.
+
+The writers consume an iterable of rows and write them one at a time, so
+the exported model is never held as a whole in memory.
+"""
+
+import abc
+import contextlib
+import csv
+import functools
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+
+@contextlib.contextmanager
+def open_atomic(file_path, compress=False, newline=None, binary=False):
+    """
+    Open a temporary text file next to ``file_path``, which replaces
+    ``file_path`` only once everything is written.
+
+    Parameters
+    ----------
+    file_path : Path
+        The file to write.
+    compress : bool
+        Write gzip compressed data.
+    newline : str
+        Passed on to ``open()``.
+    binary : bool
+        Open the file in binary mode.
+    """
+    file_path = Path(file_path)
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            stream = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+            if binary:
+                with stream:
+                    yield stream
+            else:
+                with io.TextIOWrapper(stream, encoding="utf-8", newline=newline) as f:
+                    yield f
+        # mkstemp() creates files only readable by the owner
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+@functools.cache
+def _json_encoder(indent):
+    if indent is None:
+        return json.JSONEncoder(separators=(",", ":"))
+    return json.JSONEncoder(indent=indent)
+
+
+def encode_json(row, indent=4):
+    """
+    Encode one row the way it appears as an item of the array written by
+    ``iter_json()``.
+    """
+    chunk = _json_encoder(indent).encode(row)
+    if indent is None:
+        return chunk
+    prefix = " " * indent
+    return prefix + chunk.replace("\n", "\n" + prefix)
+
+
+def iter_json_fragments(fragments, indent=4):
+    """
+    Join rows encoded by ``encode_json()`` into a JSON array.
+
+    Yields
+    ------
+    str
+        Consecutive chunks of the document.
+    """
+    if indent is None:
+        separator, opening, closing = ",", "[", "]"
+    else:
+        separator, opening, closing = ",\n", "[\n", "\n]"
+
+    first = True
+    for fragment in fragments:
+        if first:
+            yield opening
+            first = False
+        else:
+            yield separator
+        yield fragment
+    yield "[]" if first else closing
+
+
+def iter_json(rows, indent=4):
+    """
+    Encode ``rows`` as a JSON array, one row at a time.
+
+    With ``indent`` the output is identical to ``json.dumps(list(rows),
+    indent=indent)``; with ``indent=None`` it is compact.
+
+    Yields
+    ------
+    str
+        Consecutive chunks of the document.
+    """
+    return iter_json_fragments((encode_json(row, indent) for row in rows), indent)
+
+
+def write_json(file_path, rows, indent=4, compress=False, encoded=False):
+    """
+    Stream ``rows`` to ``file_path`` as JSON, atomically.
+
+    With ``encoded``, the rows are fragments from ``encode_json()``.
+    """
+    chunks = (iter_json_fragments if encoded else iter_json)(rows, indent=indent)
+    with open_atomic(file_path, compress=compress) as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def edges_path(file_path):
+    """
+    The file next to ``file_path`` that holds the edge table, for formats
+    with one table per file.
+    """
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.stem}_edges{file_path.suffix}")
+
+
+class TableWriter(abc.ABC):
+    """
+    Base class for the tabular writers.
+
+    A table writer is a context manager, which receives the rows of two
+    tables, elements and edges, interleaved in the order they are produced.
+
+    Methods
+    -------
+    open(self)
+        Open the output, entering resources on ``self._stack``.
+    write_element(self, row)
+        Write one row of the element table.
+    write_edge(self, row)
+        Write one row of the edge table.
+    """
+
+    def __init__(self, file_path, element_columns, edge_columns):
+        self.file_path = Path(file_path)
+        self.element_columns = element_columns
+        self.edge_columns = edge_columns
+        self._stack = contextlib.ExitStack()
+
+    def __enter__(self):
+        with self._stack:
+            self.open()
+            self._stack = self._stack.pop_all()
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            try:
+                self.finish()
+            except BaseException:
+                if not self._stack.__exit__(*sys.exc_info()):
+                    raise
+                return False
+        return self._stack.__exit__(*exc_info)
+
+    @abc.abstractmethod
+    def open(self):
+        pass
+
+    def finish(self):
+        pass
+
+    @abc.abstractmethod
+    def write_element(self, row):
+        pass
+
+    @abc.abstractmethod
+    def write_edge(self, row):
+        pass
+
+
+class CsvWriter(TableWriter):
+    """
+    Write the element table to ``file_path`` and the edge table to a second
+    file, see ``edges_path()``.
+    """
+
+    dialect = "excel"
+
+    def open(self):
+        elements = self._stack.enter_context(open_atomic(self.file_path, newline=""))
+        edges = self._stack.enter_context(
+            open_atomic(edges_path(self.file_path), newline="")
+        )
+        self._elements = csv.writer(elements, dialect=self.dialect)
+        self._edges = csv.writer(edges, dialect=self.dialect)
+        self._elements.writerow(self.element_columns)
+        self._edges.writerow(self.edge_columns)
+
+    def write_element(self, row):
+        self._elements.writerow(row)
+
+    def write_edge(self, row):
+        self._edges.writerow(row)
+
+
+class TxtWriter(CsvWriter):
+    """
+    Like ``CsvWriter``, with tab separated columns.
+    """
+
+    dialect = "excel-tab"
+
+
+# Characters XML 1.0 does not allow, not even escaped
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_CONTENT_TYPES = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">\
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>\
+<Default Extension="xml" ContentType="application/xml"/>\
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>\
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+<Override PartName="/xl/worksheets/sheet2.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>\
+</Types>"""
+
+_ROOT_RELS = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>\
+</Relationships>"""
+
+_WORKBOOK = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">\
+<sheets>\
+<sheet name="Elements" sheetId="1" r:id="rId1"/>\
+<sheet name="Edges" sheetId="2" r:id="rId2"/>\
+</sheets>\
+</workbook>"""
+
+_WORKBOOK_RELS = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">\
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>\
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet2.xml"/>\
+</Relationships>"""
+
+_SHEET_START = """\
+<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>"""
+
+_SHEET_END = "</sheetData></worksheet>"
+
+
+def _column_name(index):
+    name = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+
+class _SheetRows:
+    """Encode rows as SpreadsheetML, numbering them as they come."""
+
+    def __init__(self, ncolumns):
+        self.columns = [_column_name(i) for i in range(ncolumns)]
+        self.count = 0
+
+    def encode(self, row):
+        self.count += 1
+        n = self.count
+        cells = "".join(
+            f'<c r="{column}{n}" t="inlineStr"><is><t xml:space="preserve">'
+            f"{escape(_ILLEGAL_XML.sub('', str(value)))}</t></is></c>"
+            for column, value in zip(self.columns, row, strict=True)
+            if value is not None and value != ""
+        )
+        return f'<row r="{n}">{cells}</row>'.encode("utf-8")
+
+
+class XlsxWriter(TableWriter):
+    """
+    Write an Office Open XML workbook, with the elements and edges on
+    separate sheets.
+
+    The workbook is written without third party packages. Cells hold inline
+    strings, so no shared string table is needed. A zip archive member can
+    only be written one at a time, so the edge rows are spooled to a
+    temporary file while the element sheet is written.
+    """
+
+    # Edge rows held in memory before spooling to disk
+    SPOOL_SIZE = 1 << 20
+
+    def open(self):
+        f = self._stack.enter_context(open_atomic(self.file_path, binary=True))
+        self._zip = self._stack.enter_context(
+            zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED)
+        )
+        self._edges_spool = self._stack.enter_context(
+            tempfile.SpooledTemporaryFile(self.SPOOL_SIZE)
+        )
+
+        self._zip.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _WORKBOOK)
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+
+        self._sheet = self._stack.enter_context(
+            self._zip.open("xl/worksheets/sheet1.xml", "w")
+        )
+        self._sheet.write(_SHEET_START.encode("utf-8"))
+        self._element_rows = _SheetRows(len(self.element_columns))
+        self._edge_rows = _SheetRows(len(self.edge_columns))
+        self.write_element(self.element_columns)
+        self.write_edge(self.edge_columns)
+
+    def finish(self):
+        self._sheet.write(_SHEET_END.encode("utf-8"))
+        self._sheet.close()
+        with self._zip.open("xl/worksheets/sheet2.xml", "w") as sheet:
+            sheet.write(_SHEET_START.encode("utf-8"))
+            self._edges_spool.seek(0)
+            shutil.copyfileobj(self._edges_spool, sheet)
+            sheet.write(_SHEET_END.encode("utf-8"))
+
+    def write_element(self, row):
+        self._sheet.write(self._element_rows.encode(row))
+
+    def write_edge(self, row):
+        self._edges_spool.write(self._edge_rows.encode(row))
+
+
+TABLE_WRITERS = {
+    "csv": CsvWriter,
+    "txt": TxtWriter,
+    "xlsx": XlsxWriter,
+}
@@ -6,12 +6,10 @@ from gaphas.item import SE
 
 from gaphor.C4Model import c4model, diagramitems
 from seltmodelplugin import c4model as seltmodel, diagramitems as seltdiagramitems
-from gaphor.UML.toolboxconfig import namespace_config
 from gaphor.SysML import diagramitems as sysml_items
 from gaphor.SysML import sysml
 
 from gaphor.diagram.diagramtoolbox import (
-    DiagramType,
     DiagramTypes,
     ElementCreateInfo,
     ToolboxDefinition,
@@ -21,10 +19,6 @@ from gaphor.diagram.diagramtoolbox import (
     general_tools
 )
 from gaphor.i18n import gettext, i18nize
-from gaphor.UML.actions.actionstoolbox import actions
-from gaphor.UML.classes.classestoolbox import classes
-from gaphor.UML.interactions.interactionstoolbox import interactions
-from gaphor.UML.states.statestoolbox import states
 from gaphor.UML.toolboxconfig import default_namespace, namespace_config
 from gaphor.UML.uml import (
     Activity,
@@ -0,0 +1,56 @@
+import pytest
+
+from seltmodelplugin.c4model import C4Container
+from seltmodelplugin.tableexport import TableExporter
+from seltmodelplugin.tableexport import backend
+
+SIZES = {
+    "small": {"containers": 100, "dependencies": 200, "files": 0},
+    "large": {"containers": 5000, "dependencies": 10000, "files": 0},
+}
+
+
+@pytest.fixture(params=SIZES.values(), ids=SIZES.keys())
+def exporter(request, model, element_factory, model_index, event_manager):
+    model(**request.param)
+    exporter = TableExporter(
+        element_factory=element_factory,
+        model_index=model_index,
+        event_manager=event_manager,
+    )
+    yield exporter
+    exporter.shutdown()
+
+
+def test_export_backend(benchmark, exporter):
+    def export():
+        exporter.fragments.clear()
+        return exporter._export_backend()
+
+    assert benchmark(export).startswith("[")
+
+
+def test_export_backend_cached(benchmark, exporter):
+    exporter._export_backend()
+
+    assert benchmark(exporter._export_backend).startswith("[")
+
+
+def test_export_backend_one_change(benchmark, exporter, element_factory):
+    container = next(element_factory.select(C4Container))
+    exporter._export_backend()
+
+    def export():
+        container.description = (container.description or "") + "."
+        return exporter._export_backend()
+
+    assert benchmark(export).startswith("[")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_save_table(benchmark, exporter, tmp_path, fmt):
+    file_path = tmp_path / f"export.{fmt}"
+
+    benchmark(backend.write_model_table, exporter.model_index, fmt, file_path)
+
+    assert file_path.exists()
@@ -0,0 +1,39 @@
+import pytest
+
+from gaphor.core.eventmanager import EventManager
+from gaphor.core.modeling import ElementFactory
+from gaphor.storage import storage
+from seltmodelplugin.modelindex import ModelIndex
+from seltmodelplugin.tableexport.reader import read_model
+
+SIZES = {
+    "small": {"containers": 100, "dependencies": 200, "files": 5},
+    "large": {"containers": 5000, "dependencies": 10000, "files": 20},
+}
+
+
+@pytest.fixture(params=SIZES.values(), ids=SIZES.keys())
+def model_file(request, model, element_factory, tmp_path):
+    model(image_sizes=((64, 64),), **request.param)
+    model_file = tmp_path / "model.gaphor"
+    with open(model_file, "w", encoding="utf-8") as f:
+        storage.save(f, element_factory)
+    return model_file
+
+
+def load(model_file, modeling_language):
+    event_manager = EventManager()
+    element_factory = ElementFactory(event_manager)
+    model_index = ModelIndex(event_manager, element_factory)
+    with open(model_file, encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    model_index.rebuild()
+    return model_index
+
+
+def test_load_model(benchmark, model_file, modeling_language):
+    benchmark(load, model_file, modeling_language)
+
+
+def test_read_model_streaming(benchmark, model_file, modeling_language):
+    benchmark(read_model, model_file, modeling_language.lookup_element)
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from seltmodelplugin.observer import ObserverService
+from seltmodelplugin.observer.hashcache import hash_cache
+
+
+@pytest.fixture(params=[10, 200], ids=["10-files", "200-files"])
+def observer(request, model, event_manager, element_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(hash_cache, "_cache_file", tmp_path / "hashes.json")
+    monkeypatch.setattr(hash_cache, "_entries", {})
+    model(containers=50, dependencies=50, files=request.param, image_sizes=((64, 64),))
+    observer = ObserverService(event_manager, element_factory)
+    yield observer
+    observer.shutdown()
+
+
+def check_all(observer, model_file):
+    """What ``trigger_function`` does, without handing off to the main
+    loop."""
+    observer.rebuild_index(model_file)
+    index = {path: list(elements) for path, elements in observer._index.items()}
+    observer.apply_results(index, observer.scan(list(index)))
+
+
+def test_trigger_function_unchanged(benchmark, observer, tmp_path):
+    benchmark(check_all, observer, tmp_path / "model.gaphor")
+
+
+def test_trigger_function_verify_content(benchmark, observer, tmp_path):
+    for file_path in tmp_path.glob("*.png"):
+        # Touched, not changed: only a content hash tells
+        os.utime(file_path)
+    model_file = tmp_path / "model.gaphor"
+    observer.rebuild_index(model_file)
+    index = {path: list(elements) for path, elements in observer._index.items()}
+    recorded = {
+        path: {(e.fileSize, e.fileMtimeNs) for e in elements}
+        for path, elements in index.items()
+    }
+
+    def scan():
+        # Hash every file again, not only the first round
+        hash_cache._entries = {}
+        return observer.scan(list(index), recorded)
+
+    results = benchmark(scan)
+
+    assert all(state.digest for state in results.values())
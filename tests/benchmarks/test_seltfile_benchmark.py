@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import cairo
+import pytest
+from PIL import Image
+
+from gaphor.core import Transaction
+from gaphor.core.modeling import Diagram
+from seltmodelplugin.c4model import seltFile
+from seltmodelplugin.diagramitems.seltFile import seltFileItem
+from seltmodelplugin.imaging import file_key, surface_cache, thumbnail_cache
+from seltmodelplugin.imaging.pyramid import level_for, source_info
+
+IMAGE_SIZES = [(256, 256), (1024, 768), (3000, 2000)]
+MODES = ["RGB", "RGBA", "L", "P"]
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnail_cache, "_directory", tmp_path / "thumbnails")
+    surface_cache.clear()
+    yield
+    surface_cache.clear()
+
+
+def create_item(event_manager, element_factory):
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+        item = diagram.create(
+            seltFileItem, subject=next(element_factory.select(seltFile), None)
+        )
+        item.width, item.height = 200, 150
+    return item
+
+
+@pytest.fixture(params=IMAGE_SIZES, ids=lambda size: "x".join(map(str, size)))
+def image(request):
+    return Image.effect_noise(request.param, 64).convert("RGB")
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_from_pil(benchmark, event_manager, element_factory, image, mode):
+    image = image.convert(mode)
+    item = create_item(event_manager, element_factory)
+
+    surface = benchmark(item._from_pil, image)
+
+    assert (surface.get_width(), surface.get_height()) == image.size
+
+
+@pytest.fixture(params=IMAGE_SIZES, ids=lambda size: "x".join(map(str, size)))
+def item(request, model, event_manager, element_factory):
+    model(containers=0, dependencies=0, files=1, image_sizes=(request.param,))
+    return create_item(event_manager, element_factory)
+
+
+def draw(item, zoom=1.0):
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 400, 300)
+    cr = cairo.Context(surface)
+    cr.scale(zoom, zoom)
+    context = SimpleNamespace(cairo=cr, style={})
+    item.draw_content(None, context, (0, 0, item.width, item.height))
+
+
+def decode(item, zoom=1.0):
+    """Decode the image level ``draw_content`` asks for, as the image decoder
+    would in the background."""
+    key = file_key(item.subject.filePath)
+    info = source_info(key)
+    level = level_for(info.size, (item.width, item.height), zoom)
+    surface = item._decode_surface(item.subject.filePath, key, info.size, level)
+    surface_cache.put((key, level), surface)
+    return surface
+
+
+def test_decode_surface(benchmark, item, tmp_path):
+    def cold():
+        surface_cache.clear()
+        for thumbnail in (tmp_path / "thumbnails").rglob("*.argb"):
+            thumbnail.unlink()
+        return decode(item)
+
+    assert benchmark(cold) is not None
+
+
+def test_decode_surface_from_thumbnail(benchmark, item):
+    decode(item)
+
+    def from_disk():
+        surface_cache.clear()
+        return decode(item)
+
+    assert benchmark(from_disk) is not None
+
+
+@pytest.mark.parametrize("zoom", [0.25, 1.0, 4.0])
+def test_draw_content(benchmark, item, zoom):
+    decode(item, zoom)
+
+    benchmark(draw, item, zoom)
@@ -0,0 +1,65 @@
+import pytest
+
+from gaphor.core import Transaction
+from gaphor.core.modeling import Diagram
+from seltmodelplugin.c4model import C4Container
+from seltmodelplugin.diagramitems import C4ContainerItem
+from seltmodelplugin.spatial import diagram_index, route_orthogonal
+
+ITEM_COUNTS = [100, 1000]
+SPACING = 150
+
+
+@pytest.fixture(params=ITEM_COUNTS)
+def diagram(request, event_manager, element_factory):
+    """A square grid of containers, with a gap between the rows and columns."""
+    columns = int(request.param**0.5)
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+        for i in range(request.param):
+            item = diagram.create(
+                C4ContainerItem, subject=element_factory.create(C4Container)
+            )
+            item.matrix.translate(i % columns * SPACING, i // columns * SPACING)
+            item.width = item.height = 100
+    return diagram
+
+
+def test_items_at(benchmark, diagram):
+    index = diagram_index(diagram)
+
+    items = benchmark(index.items_at, SPACING + 50, SPACING + 50)
+
+    assert len(items) == 1
+
+
+def test_items_in(benchmark, diagram):
+    index = diagram_index(diagram)
+
+    items = benchmark(index.items_in, (0, 0, 2 * SPACING + 100, 2 * SPACING + 100))
+
+    assert len(items) == 9
+
+
+def test_move_item(benchmark, diagram):
+    index = diagram_index(diagram)
+    item = next(iter(diagram.select(C4ContainerItem)))
+
+    def move():
+        item.matrix.translate(1, 0)
+
+    benchmark(move)
+
+    assert index.bounds(item)[0] > 0
+
+
+def test_route_around_item(benchmark, diagram):
+    index = diagram_index(diagram)
+
+    # From the right of the first item to the left of the third, with the
+    # second one in between
+    points = benchmark(
+        route_orthogonal, index, (100, 50), (2 * SPACING, 50)
+    )
+
+    assert len(points) > 2
@@ -0,0 +1,128 @@
+import random
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from gaphor.core import Transaction
+from gaphor.core.eventmanager import EventManager
+from gaphor.core.modeling import ElementFactory
+from gaphor.services.modelinglanguage import ModelingLanguageService
+from gaphor.UML import uml
+from seltmodelplugin import c4model
+from seltmodelplugin.modelindex import ModelIndex
+
+
+def write_image(file_path, size, seed=0):
+    """Write an RGB noise image, which does not compress to nothing."""
+    noise = Image.effect_noise(size, 64 + seed % 64)
+    Image.merge("RGB", (noise, noise.transpose(Image.Transpose.ROTATE_180), noise)).save(
+        file_path
+    )
+    return file_path
+
+
+def generate_model(
+    event_manager,
+    element_factory,
+    directory,
+    containers=100,
+    depth=3,
+    dependencies=200,
+    files=10,
+    image_sizes=((256, 256), (1024, 768), (3000, 2000)),
+    seed=0,
+):
+    """Build a SELT model in ``element_factory``.
+
+    Containers are nested ``depth`` levels deep, alternating between
+    ``nestedPackage`` and ``ownerContainer``. Every seltFile gets an image
+    attachment in ``directory``, cycling through ``image_sizes``, and a
+    dependency on a container. File paths are relative to ``directory``.
+    """
+    rng = random.Random(seed)
+    directory = Path(directory)
+    with Transaction(event_manager):
+        root = element_factory.create(uml.Package)
+        root.name = "model"
+
+        levels = [[] for _ in range(depth)]
+        for i in range(containers):
+            level = i % depth
+            cls = c4model.C4Database if i % 7 == 3 else c4model.C4Container
+            container = element_factory.create(cls)
+            container.name = f"container {i}"
+            container.description = f"Description of container {i}" if i % 2 else ""
+            container.type = rng.choice(["System", "Container", "Component"])
+            if level == 0 or not levels[level - 1]:
+                container.package = root
+            elif i % 2:
+                container.package = rng.choice(levels[level - 1])
+            else:
+                container.ownerContainer = rng.choice(levels[level - 1])
+            levels[level].append(container)
+        all_containers = [c for level in levels for c in level]
+
+        for i in range(dependencies):
+            dependency = element_factory.create(c4model.C4Dependency)
+            dependency.name = f"uses {i}" if i % 3 else ""
+            dependency.client = rng.choice(all_containers)
+            dependency.supplier = rng.choice(all_containers)
+
+        for i in range(files):
+            size = image_sizes[i % len(image_sizes)]
+            file_path = write_image(directory / f"attachment_{i}.png", size, seed + i)
+            st = file_path.stat()
+            selt_file = element_factory.create(c4model.seltFile)
+            selt_file.name = file_path.name
+            selt_file.filePath = file_path.name
+            selt_file.lastModified = int(st.st_mtime)
+            selt_file.fileSize = st.st_size
+            selt_file.fileMtimeNs = st.st_mtime_ns
+            selt_file.package = root
+            if all_containers:
+                dependency = element_factory.create(c4model.C4Dependency)
+                dependency.client = selt_file
+                dependency.supplier = rng.choice(all_containers)
+    return root
+
+
+@pytest.fixture
+def event_manager():
+    event_manager = EventManager()
+    yield event_manager
+    event_manager.shutdown()
+
+
+@pytest.fixture
+def element_factory(event_manager):
+    element_factory = ElementFactory(event_manager)
+    yield element_factory
+    element_factory.shutdown()
+
+
+@pytest.fixture
+def model_index(event_manager, element_factory):
+    model_index = ModelIndex(event_manager, element_factory)
+    yield model_index
+    model_index.shutdown()
+
+
+@pytest.fixture(scope="session")
+def modeling_language():
+    return ModelingLanguageService()
+
+
+@pytest.fixture
+def model(event_manager, element_factory, tmp_path, monkeypatch):
+    """A function that fills the element factory with a generated model.
+
+    The working directory is the model directory, so relative attachment
+    paths resolve.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    def model(**kwargs):
+        return generate_model(event_manager, element_factory, tmp_path, **kwargs)
+
+    return model
@@ -0,0 +1,94 @@
+import pytest
+from PIL import Image
+
+from seltmodelplugin.imaging import convert
+from seltmodelplugin.imaging.convert import A, B, G, R, to_surface
+
+
+@pytest.fixture(params=["numpy", "pillow"])
+def fill(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(convert, "_numpy", lambda: None)
+    return request.param
+
+
+def pixel(surface, x, y):
+    """The premultiplied ``(r, g, b, a)`` of a pixel of an ARGB32 surface."""
+    data = bytes(surface.get_data())
+    offset = y * surface.get_stride() + x * 4
+    return tuple(data[offset + i] for i in (R, G, B, A))
+
+
+def solid(mode, color, size=(3, 2)):
+    return Image.new(mode, size, color)
+
+
+@pytest.mark.parametrize(
+    "image, expected",
+    [
+        (solid("RGB", (200, 100, 50)), (200, 100, 50, 255)),
+        (solid("L", 80), (80, 80, 80, 255)),
+        (solid("1", 1), (255, 255, 255, 255)),
+        (solid("LA", (200, 128)), (100, 100, 100, 128)),
+        (solid("RGBA", (200, 100, 50, 128)), (100, 50, 25, 128)),
+        (solid("RGBA", (200, 100, 50, 0)), (0, 0, 0, 0)),
+        (solid("CMYK", (0, 0, 0, 0)), (255, 255, 255, 255)),
+        (solid("RGB", (200, 100, 50)).quantize(), (200, 100, 50, 255)),
+        (solid("I;16", 65535), (255, 255, 255, 255)),
+        (solid("I;16", 256 * 40), (40, 40, 40, 255)),
+        (solid("F", 0.5), (127, 127, 127, 255)),
+        (solid("I", 200), (200, 200, 200, 255)),
+    ],
+    ids=lambda v: v.mode if isinstance(v, Image.Image) else None,
+)
+def test_modes(fill, image, expected):
+    surface = to_surface(image)
+
+    assert (surface.get_width(), surface.get_height()) == image.size
+    assert pixel(surface, 0, 0) == expected
+    assert pixel(surface, 2, 1) == expected
+
+
+def test_transparent_palette(fill):
+    image = Image.new("P", (2, 1))
+    image.putpalette([255, 0, 0, 0, 0, 255])
+    image.putpixel((1, 0), 1)
+    image.info["transparency"] = 0
+
+    surface = to_surface(image)
+
+    assert pixel(surface, 0, 0) == (0, 0, 0, 0)
+    assert pixel(surface, 1, 0) == (0, 0, 255, 255)
+
+
+def test_high_depth_range_is_stretched(fill):
+    image = Image.new("I", (2, 1), -1000)
+    image.putpixel((1, 0), 3000)
+
+    surface = to_surface(image)
+
+    assert pixel(surface, 0, 0) == (0, 0, 0, 255)
+    assert pixel(surface, 1, 0) == (255, 255, 255, 255)
+
+
+def test_converted_in_bands(fill, monkeypatch):
+    monkeypatch.setattr(convert, "BAND_PIXELS", 8)
+    image = Image.linear_gradient("L").resize((5, 16)).convert("RGBA")
+    image.putalpha(255)
+
+    surface = to_surface(image)
+
+    for y in range(16):
+        value = image.getpixel((0, y))[0]
+        assert pixel(surface, 4, y) == (value, value, value, 255)
+
+
+def test_source_is_left_untouched(fill):
+    image = solid("P", 3)
+
+    to_surface(image)
+
+    assert image.mode == "P"
+    assert image.getpixel((0, 0)) == 3
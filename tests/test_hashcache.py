@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+
+from seltmodelplugin.observer import hashcache
+from seltmodelplugin.observer.hashcache import HashCache
+
+
+def blake2b(data):
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def count_reads(monkeypatch):
+    reads = []
+
+    def hash_file(file_path):
+        reads.append(file_path)
+        with open(file_path, "rb") as f:
+            return blake2b(f.read())
+
+    monkeypatch.setattr(hashcache, "hash_file", hash_file)
+    return reads
+
+
+def test_digest_is_read_once(tmp_path, monkeypatch):
+    reads = count_reads(monkeypatch)
+    file_path = tmp_path / "file.txt"
+    file_path.write_bytes(b"content")
+    cache = HashCache(tmp_path / "hashes.json")
+
+    assert cache.digest(file_path) == blake2b(b"content")
+    assert cache.digest(file_path, os.stat(file_path)) == blake2b(b"content")
+    assert reads == [file_path]
+
+
+def test_changed_file_is_read_again(tmp_path):
+    file_path = tmp_path / "file.txt"
+    file_path.write_bytes(b"content")
+    cache = HashCache(tmp_path / "hashes.json")
+    cache.digest(file_path)
+
+    file_path.write_bytes(b"other content")
+
+    assert cache.digest(file_path) == blake2b(b"other content")
+
+
+def test_saved_across_instances(tmp_path, monkeypatch):
+    cache_file = tmp_path / "cache" / "hashes.json"
+    file_path = tmp_path / "file.txt"
+    file_path.write_bytes(b"content")
+    cache = HashCache(cache_file)
+    cache.digest(file_path)
+    cache.save()
+    reads = count_reads(monkeypatch)
+
+    cache = HashCache(cache_file)
+    assert cache.digest(file_path) == blake2b(b"content")
+    assert reads == []
+
+    cache_file.unlink()
+    cache.save()
+
+    # Nothing new to write
+    assert not cache_file.exists()
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    cache_file = tmp_path / "hashes.json"
+    cache_file.write_text("{not json")
+    file_path = tmp_path / "file.txt"
+    file_path.write_bytes(b"content")
+    cache = HashCache(cache_file)
+
+    assert cache.digest(file_path) == blake2b(b"content")
+
+    cache.save()
+
+    assert len(json.loads(cache_file.read_text())) == 1
+
+
+def test_oldest_entries_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(hashcache, "MAX_ENTRIES", 2)
+    reads = count_reads(monkeypatch)
+    cache = HashCache(tmp_path / "hashes.json")
+    files = []
+    for i in range(3):
+        files.append(tmp_path / f"file{i}.txt")
+        files[-1].write_bytes(b"%d" % i)
+        cache.digest(files[-1])
+
+    cache.digest(files[2])
+    cache.digest(files[0])
+
+    assert reads == [*files, files[0]]
+
+
+def test_concurrent_saves(tmp_path):
+    cache_file = tmp_path / "hashes.json"
+    cache = HashCache(cache_file)
+
+    def hash_and_save(i):
+        file_path = tmp_path / f"file{i}.txt"
+        file_path.write_bytes(b"%d" % i)
+        cache.digest(file_path)
+        cache.save()
+
+    threads = [threading.Thread(target=hash_and_save, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache.save()
+
+    assert len(json.loads(cache_file.read_text())) == 8
+    assert not list(tmp_path.glob("*.tmp"))
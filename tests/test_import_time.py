@@ -0,0 +1,79 @@
+"""Import time budget for the plugin entry points.
+
+Gaphor imports every plugin on start up, so whatever the entry points
+import is paid for on each launch, SELT diagram or not. The modules Gaphor
+loads itself are imported first, so only the plugin's own share is measured
+with ``-X importtime``.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+# Imported by Gaphor before any plugin is loaded
+GAPHOR_MODULES = (
+    "gaphor.core",
+    "gaphor.abc",
+    "gaphor.UML",
+    "gaphor.SysML",
+    "gaphor.C4Model",
+    "gaphor.diagram.presentation",
+)
+
+# Cumulative import time per entry point, in milliseconds
+BUDGETS = {
+    "seltmodelplugin.modelinglanguage": 150,
+    "seltmodelplugin.propertypages": 200,
+    "seltmodelplugin.observer": 100,
+    "seltmodelplugin.modelindex": 50,
+    "seltmodelplugin.tableexport": 200,
+    "seltmodelplugin.diagnostics": 150,
+    "seltmodelplugin.tableexport.cli": 250,
+}
+
+RUNS = 3
+
+
+def import_time(module):
+    """Cumulative microseconds spent importing ``module`` and what it
+    imports, on top of ``GAPHOR_MODULES``."""
+    code = f"import {', '.join(GAPHOR_MODULES)}; import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        if "ModuleNotFoundError" in result.stderr:
+            missing = result.stderr.splitlines()[-1]
+            pytest.skip(f"{module} can not be imported here: {missing}")
+        raise AssertionError(result.stderr)
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise AssertionError(f"{module} was imported before")
+
+
+@pytest.mark.parametrize("module", BUDGETS)
+def test_import_time_within_budget(module):
+    # Best of a few runs, the first one may warm up the disk cache
+    elapsed = min(import_time(module) for _ in range(RUNS)) / 1000
+
+    assert elapsed <= BUDGETS[module], (
+        f"Importing {module} took {elapsed:.1f} ms, budget is {BUDGETS[module]} ms"
+    )
+
+
+def test_imaging_does_not_import_pillow_or_numpy():
+    # Gaphor's own picture item imports Pillow, but the image decoding of
+    # seltFile items should not add to that before a file is drawn
+    code = (
+        "import sys; sys.modules['PIL'] = sys.modules['numpy'] = None; "
+        "import seltmodelplugin.imaging, seltmodelplugin.imaging.pyramid, "
+        "seltmodelplugin.imaging.tiles, seltmodelplugin.imaging.vector"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,177 @@
+from gaphor.C4Model import c4model as gaphor_c4model
+from gaphor.core import Transaction
+from gaphor.core.modeling import Element
+from gaphor.UML import uml
+from seltmodelplugin import c4model
+from seltmodelplugin.modelindex import CONTAINER_TYPES, ModelIndex
+from seltmodelplugin.modelindex.modelindex import Adjacency
+
+
+def create(element_factory, cls, name):
+    element = element_factory.create(cls)
+    element.name = name
+    return element
+
+
+def names(elements):
+    return [e.name for e in elements]
+
+
+def assert_matches_model(model_index, element_factory):
+    """The index answers what walking the model answers."""
+    for element in element_factory.select():
+        if isinstance(element, uml.Package):
+            assert model_index.nested_packages(element) == list(element.nestedPackage)
+        if isinstance(element, CONTAINER_TYPES):
+            assert model_index.owned_containers(element) == list(
+                element.owningContainer
+            )
+        assert model_index.client_dependencies(element) == [
+            d
+            for d in element_factory.select(c4model.C4Dependency)
+            if d.client is element
+        ]
+        assert model_index.supplier_dependencies(element) == [
+            d
+            for d in element_factory.select(c4model.C4Dependency)
+            if d.supplier is element
+        ]
+
+
+def test_nesting_in_model_order(event_manager, element_factory, model_index):
+    with Transaction(event_manager):
+        root = create(element_factory, uml.Package, "root")
+        other = create(element_factory, uml.Package, "other")
+        children = [
+            create(element_factory, c4model.C4Container, name) for name in "abc"
+        ]
+        for child in children:
+            child.package = root
+
+    assert names(model_index.nested_packages(root)) == ["a", "b", "c"]
+
+    with Transaction(event_manager):
+        children[0].package = other
+        children[0].package = root
+
+    assert names(model_index.nested_packages(root)) == ["b", "c", "a"]
+    assert model_index.nesting.parent(children[0]) is root
+
+    with Transaction(event_manager):
+        children[1].unlink()
+        other.unlink()
+
+    assert names(model_index.nested_packages(root)) == ["c", "a"]
+    assert_matches_model(model_index, element_factory)
+
+
+def test_containment_of_both_c4_models(event_manager, element_factory, model_index):
+    with Transaction(event_manager):
+        system = create(element_factory, c4model.C4Container, "system")
+        service = create(element_factory, c4model.C4Container, "service")
+        database = create(element_factory, c4model.C4Database, "database")
+        gaphor_system = create(element_factory, gaphor_c4model.C4Container, "g")
+        gaphor_part = create(element_factory, gaphor_c4model.C4Container, "part")
+        service.ownerContainer = system
+        database.ownerContainer = system
+        gaphor_part.ownerContainer = gaphor_system
+
+    assert names(model_index.owned_containers(system)) == ["service", "database"]
+    assert names(model_index.owned_containers(gaphor_system)) == ["part"]
+
+    with Transaction(event_manager):
+        database.ownerContainer = service
+        gaphor_part.ownerContainer = None
+
+    assert names(model_index.owned_containers(system)) == ["service"]
+    assert names(model_index.owned_containers(service)) == ["database"]
+    assert model_index.owned_containers(gaphor_system) == []
+    assert model_index.containment.parent(gaphor_part) is None
+    assert_matches_model(model_index, element_factory)
+
+
+def test_dependencies(event_manager, element_factory, model_index):
+    with Transaction(event_manager):
+        a, b, c = (create(element_factory, c4model.C4Container, n) for n in "abc")
+        uses = create(element_factory, c4model.C4Dependency, "uses")
+        uses.client, uses.supplier = a, b
+        reads = create(element_factory, c4model.C4Dependency, "reads")
+        reads.client, reads.supplier = a, c
+
+    assert names(model_index.client_dependencies(a)) == ["uses", "reads"]
+    assert names(model_index.supplier_dependencies(b)) == ["uses"]
+
+    with Transaction(event_manager):
+        uses.supplier = c
+        reads.unlink()
+
+    assert names(model_index.client_dependencies(a)) == ["uses"]
+    assert model_index.supplier_dependencies(b) == []
+    assert names(model_index.supplier_dependencies(c)) == ["uses"]
+
+    with Transaction(event_manager):
+        a.unlink()
+
+    assert model_index.client_dependencies(a) == []
+    assert_matches_model(model_index, element_factory)
+
+
+def test_select_in_creation_order(event_manager, element_factory, model_index):
+    with Transaction(event_manager):
+        elements = [
+            create(element_factory, cls, str(i))
+            for i, cls in enumerate(
+                [
+                    c4model.C4Container,
+                    c4model.C4Database,
+                    uml.Package,
+                    c4model.C4Container,
+                    gaphor_c4model.C4Container,
+                ]
+            )
+        ]
+
+    assert list(model_index.select(*CONTAINER_TYPES)) == [
+        elements[i] for i in (0, 1, 3, 4)
+    ]
+    assert list(model_index.select(c4model.C4Database)) == [elements[1]]
+    assert list(model_index.select(uml.Package)) == elements
+    assert list(model_index.select(Element)) == list(element_factory.select())
+
+
+def test_live_index_equals_rebuilt(model, event_manager, element_factory, model_index):
+    model(containers=60, dependencies=80, files=2, image_sizes=((16, 16),))
+    with Transaction(event_manager):
+        containers = list(element_factory.select(c4model.C4Container))
+        for child, parent in zip(containers[1::5], containers[::7], strict=False):
+            if parent is not child and child.ownerContainer:
+                child.ownerContainer = parent
+
+    rebuilt = ModelIndex(event_manager, element_factory)
+    try:
+        for element in element_factory.select():
+            assert model_index.nested_packages(element) == rebuilt.nested_packages(
+                element
+            )
+            assert model_index.owned_containers(element) == rebuilt.owned_containers(
+                element
+            )
+            assert model_index.client_dependencies(
+                element
+            ) == rebuilt.client_dependencies(element)
+    finally:
+        rebuilt.shutdown()
+    assert_matches_model(model_index, element_factory)
+
+
+def test_adjacency_forget(element_factory):
+    parent, child, grandchild = (element_factory.create(uml.Package) for _ in range(3))
+    adjacency = Adjacency("nestedPackage")
+    adjacency.set(child, parent)
+    adjacency.set(grandchild, child)
+
+    adjacency.forget(child)
+
+    assert adjacency.parent(child) is None
+    assert adjacency.parent(grandchild) is None
+    assert adjacency.children(parent) == []
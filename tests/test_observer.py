@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+from gaphor.core import Transaction
+from seltmodelplugin.c4model import seltFile
+from seltmodelplugin.observer import ObserverService, updatefilesmetadata
+from seltmodelplugin.observer.hashcache import hash_cache
+from seltmodelplugin.observer.updatefilesmetadata import TIMED_OUT, stat_file
+
+
+@pytest.fixture
+def observer(event_manager, element_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(hash_cache, "_cache_file", tmp_path / "hashes.json")
+    monkeypatch.setattr(hash_cache, "_entries", {})
+    monkeypatch.chdir(tmp_path)
+    observer = ObserverService(event_manager, element_factory)
+    yield observer
+    observer.shutdown()
+
+
+def attach(event_manager, element_factory, file_path):
+    file_path.write_bytes(b"content")
+    state = stat_file(file_path)
+    with Transaction(event_manager):
+        element = element_factory.create(seltFile)
+        element.filePath = str(file_path)
+        element.lastModified = state.mtime
+        element.fileMtimeNs = state.mtime_ns
+        element.fileSize = state.size
+    return element
+
+
+def test_apply_results(observer, event_manager, element_factory, tmp_path):
+    unchanged = attach(event_manager, element_factory, tmp_path / "unchanged.txt")
+    missing = attach(event_manager, element_factory, tmp_path / "missing.txt")
+    hanging = attach(event_manager, element_factory, tmp_path / "hanging.txt")
+    index = {
+        tmp_path / "unchanged.txt": [unchanged],
+        tmp_path / "missing.txt": [missing],
+        tmp_path / "hanging.txt": [hanging],
+    }
+
+    observer.apply_results(
+        index,
+        {
+            tmp_path / "unchanged.txt": stat_file(tmp_path / "unchanged.txt"),
+            tmp_path / "missing.txt": None,
+            tmp_path / "hanging.txt": TIMED_OUT,
+        },
+    )
+
+    assert not unchanged.modified
+    assert missing.modified
+    assert not hanging.modified
+
+
+def test_scan_times_out_hanging_files(observer, tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def hanging_stat(file_path):
+        if file_path.name == "hanging.txt":
+            release.wait(5)
+        return stat_file(file_path)
+
+    monkeypatch.setattr(updatefilesmetadata, "STAT_TIMEOUT", 0.1)
+    monkeypatch.setattr(updatefilesmetadata, "stat_file", hanging_stat)
+    (tmp_path / "file.txt").write_bytes(b"content")
+    (tmp_path / "hanging.txt").write_bytes(b"content")
+
+    try:
+        results = observer.scan([tmp_path / "file.txt", tmp_path / "hanging.txt"])
+        # Not checked again while the first check hangs
+        again = observer.scan([tmp_path / "hanging.txt"])
+    finally:
+        release.set()
+
+    assert results[tmp_path / "file.txt"] == stat_file(tmp_path / "file.txt")
+    assert results[tmp_path / "hanging.txt"] is TIMED_OUT
+    assert again[tmp_path / "hanging.txt"] is TIMED_OUT
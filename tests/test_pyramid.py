@@ -0,0 +1,39 @@
+import pytest
+from PIL import Image
+
+from seltmodelplugin.imaging.pyramid import decode_level, level_for, level_size
+
+
+def write(file_path, image):
+    image.save(file_path)
+    return file_path
+
+
+@pytest.mark.parametrize(
+    "mode, suffix",
+    [
+        ("P", ".png"),
+        ("P", ".gif"),
+        ("1", ".png"),
+        ("I;16", ".png"),
+        ("RGBA", ".png"),
+        ("L", ".png"),
+    ],
+)
+@pytest.mark.parametrize("level", [2, 3])
+def test_decode_level_of_any_mode(tmp_path, mode, suffix, level):
+    image = Image.effect_noise((1000, 500), 64).convert(mode)
+    file_path = write(tmp_path / f"image{suffix}", image)
+
+    decoded = decode_level(file_path, level)
+
+    width, height = level_size((1000, 500), level)
+    assert decoded.width <= width
+    assert decoded.height <= height
+    assert decoded.width >= width - 2
+
+
+def test_level_for_box():
+    assert level_for((1000, 500), (160, 80)) == 2
+    assert level_for((1000, 500), (160, 80), zoom=4.0) == 0
+    assert level_for((100, 50), (160, 80)) == 0
@@ -0,0 +1,80 @@
+import pytest
+
+from gaphor.core import Transaction
+from gaphor.core.eventmanager import EventManager
+from gaphor.core.modeling import ElementFactory
+from gaphor.storage import storage
+from gaphor.UML import uml
+from seltmodelplugin import c4model
+from seltmodelplugin.modelindex import ModelIndex
+from seltmodelplugin.tableexport import backend
+from seltmodelplugin.tableexport.reader import read_model
+
+
+def save(element_factory, file_path):
+    with open(file_path, "w", encoding="utf-8") as f:
+        storage.save(f, element_factory)
+    return file_path
+
+
+def load(model_file, modeling_language):
+    event_manager = EventManager()
+    element_factory = ElementFactory(event_manager)
+    model_index = ModelIndex(event_manager, element_factory)
+    with open(model_file, encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    model_index.rebuild()
+    return model_index
+
+
+def assert_same_export(model_file, modeling_language):
+    index = read_model(model_file, modeling_language.lookup_element)
+
+    assert "".join(backend.export_json(index)) == "".join(
+        backend.export_json(load(model_file, modeling_language))
+    )
+
+
+def create(element_factory, cls, name):
+    element = element_factory.create(cls)
+    element.name = name
+    return element
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_read_model_as_loaded(
+    model, element_factory, modeling_language, tmp_path, seed
+):
+    model(containers=60, dependencies=100, files=3, image_sizes=((16, 16),), seed=seed)
+
+    assert_same_export(
+        save(element_factory, tmp_path / "model.gaphor"), modeling_language
+    )
+
+
+def test_read_reparented_children(
+    event_manager, element_factory, modeling_language, tmp_path
+):
+    with Transaction(event_manager):
+        root = create(element_factory, uml.Package, "root")
+        other = create(element_factory, uml.Package, "other")
+        children = [
+            create(element_factory, c4model.C4Container, name) for name in "abc"
+        ]
+        for child in children:
+            child.package = root
+        parts = [create(element_factory, c4model.C4Container, name) for name in "xyz"]
+        for part in parts:
+            part.ownerContainer = children[2]
+        # Moving children away and back puts them last in their parent
+        children[0].package = other
+        children[0].package = root
+        parts[0].ownerContainer = children[1]
+        parts[0].ownerContainer = children[2]
+
+    assert [c.name for c in root.nestedPackage] == ["b", "c", "a"]
+    assert [p.name for p in children[2].owningContainer] == ["y", "z", "x"]
+
+    assert_same_export(
+        save(element_factory, tmp_path / "model.gaphor"), modeling_language
+    )
@@ -0,0 +1,91 @@
+from gaphor.core import Transaction
+from gaphor.core.modeling import Diagram
+from seltmodelplugin.c4model import C4Container
+from seltmodelplugin.diagramitems import C4ContainerItem, C4DependencyItem
+from seltmodelplugin.spatial import diagram_index
+
+
+def create_container(diagram, element_factory, x, y, width=100, height=100):
+    item = diagram.create(C4ContainerItem, subject=element_factory.create(C4Container))
+    item.matrix.translate(x, y)
+    item.width, item.height = width, height
+    return item
+
+
+def connect(diagram, line, handle, item, port):
+    diagram.connections.connect_item(
+        line, handle, item, port, port.constraint(line, handle, item)
+    )
+
+
+def points(line):
+    i2c = line.matrix_i2c
+    return [
+        tuple(round(v) for v in i2c.transform_point(*handle.pos))
+        for handle in line.handles()
+    ]
+
+
+def test_items_at_and_in(event_manager, element_factory):
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+        outer = create_container(diagram, element_factory, 0, 0, 300, 300)
+        inner = create_container(diagram, element_factory, 50, 50)
+        other = create_container(diagram, element_factory, 400, 0, 120, 120)
+    index = diagram_index(diagram)
+
+    assert index.items_at(60, 60) == [inner, outer]
+    assert set(index.items_in((-1, -1, 302, 302))) == {outer, inner}
+
+    with Transaction(event_manager):
+        other.matrix.translate(-350, 0)
+
+    assert index.items_at(60, 60) == [inner, other, outer]
+
+    with Transaction(event_manager):
+        inner.unlink()
+
+    assert inner not in index
+    assert index.items_at(60, 60) == [other, outer]
+
+
+def test_plain_dependency_updates_and_unlinks(event_manager, element_factory):
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+        dependency = diagram.create(C4DependencyItem)
+
+    diagram.update()
+
+    assert len(dependency.handles()) == 2
+
+    with Transaction(event_manager):
+        dependency.unlink()
+
+
+def test_route_around_item(event_manager, element_factory):
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+        start = create_container(diagram, element_factory, 0, 0)
+        end = create_container(diagram, element_factory, 400, 0)
+        obstacle = create_container(diagram, element_factory, 200, -50, 100, 150)
+        dependency = diagram.create(C4DependencyItem)
+        dependency.matrix.translate(100, 50)
+        dependency.head.pos = (0, 0)
+        dependency.tail.pos = (300, 0)
+        connect(diagram, dependency, dependency.head, start, start.ports()[1])
+        connect(diagram, dependency, dependency.tail, end, end.ports()[3])
+        dependency.orthogonal = True
+        dependency.horizontal = True
+
+    diagram.update()
+
+    assert len(points(dependency)) == 5
+
+    with Transaction(event_manager):
+        obstacle.matrix.translate(0, 500)
+    diagram.update()
+
+    assert {y for _, y in points(dependency)} == {50}
+
+    with Transaction(event_manager):
+        dependency.unlink()
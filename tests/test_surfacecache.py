@@ -0,0 +1,76 @@
+from seltmodelplugin.imaging.surfacecache import SurfaceCache, file_key
+
+
+def write(file_path, data=b"content"):
+    file_path.write_bytes(data)
+    return file_key(file_path)
+
+
+def test_least_recently_used_is_evicted(tmp_path):
+    cache = SurfaceCache(max_bytes=300)
+    a, b, c = (write(tmp_path / name) for name in "abc")
+    cache.put((a, 0), "a", nbytes=100)
+    cache.put((b, 0), "b", nbytes=100)
+    cache.put((c, 0), "c", nbytes=100)
+
+    assert cache.get((a, 0)) == "a"
+
+    cache.put((c, 1), "c1", nbytes=100)
+
+    assert (b, 0) not in cache
+    assert [cache.get((a, 0)), cache.get((c, 0)), cache.get((c, 1))] == ["a", "c", "c1"]
+    assert cache.nbytes == 300
+
+
+def test_byte_budget(tmp_path):
+    cache = SurfaceCache(max_bytes=250)
+    a, b = write(tmp_path / "a"), write(tmp_path / "b")
+
+    cache.put((a, 0), "a", nbytes=100)
+    cache.put((b, 0), "b", nbytes=100)
+    # Larger than the whole budget: returned, not stored
+    assert cache.put((b, 1), "huge", nbytes=300) == "huge"
+
+    assert len(cache) == 2
+    assert cache.get((b, 1)) is None
+
+    cache.max_bytes = 150
+
+    assert len(cache) == 1
+    assert cache.get((b, 0)) == "b"
+    assert cache.nbytes == 100
+
+
+def test_replace_entry(tmp_path):
+    cache = SurfaceCache(max_bytes=300)
+    a = write(tmp_path / "a")
+
+    cache.put((a, 0), "old", nbytes=100)
+    cache.put((a, 0), "new", nbytes=200)
+
+    assert cache.get((a, 0)) == "new"
+    assert cache.nbytes == 200
+
+
+def test_invalidate_by_path(tmp_path):
+    cache = SurfaceCache()
+    a, b = write(tmp_path / "a"), write(tmp_path / "b")
+    cache.put((a, 0), "a0", nbytes=100)
+    cache.put((a, 1), "a1", nbytes=25)
+    cache.put((b, 0), "b", nbytes=100)
+    generation = cache.generation
+
+    cache.invalidate(tmp_path / "sub" / ".." / "a")
+
+    assert (a, 0) not in cache
+    assert (a, 1) not in cache
+    assert cache.get((b, 0)) == "b"
+    assert cache.nbytes == 100
+    assert cache.generation > generation
+
+
+def test_changed_file_gets_new_key(tmp_path):
+    key = write(tmp_path / "a")
+
+    assert write(tmp_path / "a", b"changed content") != key
+    assert file_key(tmp_path / "missing") is None
@@ -0,0 +1,133 @@
+import csv
+import json
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pytest
+
+from seltmodelplugin.tableexport.writers import (
+    TABLE_WRITERS,
+    TableWriter,
+    edges_path,
+    iter_json,
+)
+
+ELEMENT_COLUMNS = ("name", "description", "type")
+EDGE_COLUMNS = ("source", "target")
+ELEMENTS = [("a", 'with "quotes", commas\nand lines', "System"), ("b", "", None)]
+EDGES = [("a", "b"), ("b", "<a & b>")]
+
+NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def write(fmt, file_path, elements=ELEMENTS, edges=EDGES):
+    with TABLE_WRITERS[fmt](file_path, ELEMENT_COLUMNS, EDGE_COLUMNS) as writer:
+        for element, edge in zip(elements, edges, strict=True):
+            writer.write_element(element)
+            writer.write_edge(edge)
+
+
+def read_csv(file_path, dialect):
+    with open(file_path, newline="", encoding="utf-8") as f:
+        return [tuple(row) for row in csv.reader(f, dialect=dialect)]
+
+
+def read_sheet(archive, name):
+    root = ET.fromstring(archive.read(name))
+    return [
+        {
+            cell.get("r"): cell.findtext("s:is/s:t", namespaces=NS)
+            for cell in row.findall("s:c", NS)
+        }
+        for row in root.iterfind("s:sheetData/s:row", NS)
+    ]
+
+
+@pytest.mark.parametrize("fmt, dialect", [("csv", "excel"), ("txt", "excel-tab")])
+def test_csv_and_txt(tmp_path, fmt, dialect):
+    file_path = tmp_path / f"model.{fmt}"
+
+    write(fmt, file_path)
+
+    assert read_csv(file_path, dialect) == [
+        ELEMENT_COLUMNS,
+        ELEMENTS[0],
+        ("b", "", ""),
+    ]
+    assert read_csv(edges_path(file_path), dialect) == [EDGE_COLUMNS, *EDGES]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"model.{fmt}",
+        f"model_edges.{fmt}",
+    ]
+
+
+def test_xlsx(tmp_path):
+    file_path = tmp_path / "model.xlsx"
+
+    write("xlsx", file_path)
+
+    with zipfile.ZipFile(file_path) as archive:
+        assert archive.testzip() is None
+        elements = read_sheet(archive, "xl/worksheets/sheet1.xml")
+        edges = read_sheet(archive, "xl/worksheets/sheet2.xml")
+    assert elements == [
+        {"A1": "name", "B1": "description", "C1": "type"},
+        {"A2": "a", "B2": ELEMENTS[0][1], "C2": "System"},
+        # Empty cells are left out
+        {"A3": "b"},
+    ]
+    assert edges == [
+        {"A1": "source", "B1": "target"},
+        {"A2": "a", "B2": "b"},
+        {"A3": "b", "B3": "<a & b>"},
+    ]
+
+
+def test_xlsx_drops_characters_xml_does_not_allow(tmp_path):
+    file_path = tmp_path / "model.xlsx"
+
+    write("xlsx", file_path, elements=[("a\x00b\x1f", "", "")], edges=[("a", "b")])
+
+    with zipfile.ZipFile(file_path) as archive:
+        elements = read_sheet(archive, "xl/worksheets/sheet1.xml")
+    assert elements[1] == {"A2": "ab"}
+
+
+@pytest.mark.parametrize("row", [("a", "b"), ("a", "b", "c", "d")])
+def test_xlsx_rows_must_match_columns(tmp_path, row):
+    file_path = tmp_path / "model.xlsx"
+
+    with pytest.raises(ValueError):
+        write("xlsx", file_path, elements=[row], edges=[("a", "b")])
+
+    # Nothing is left behind by a failed export
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize("fmt", TABLE_WRITERS)
+def test_failed_export_keeps_existing_file(tmp_path, fmt):
+    file_path = tmp_path / f"model.{fmt}"
+    file_path.write_text("previous export")
+
+    with (
+        pytest.raises(RuntimeError),
+        TABLE_WRITERS[fmt](file_path, ELEMENT_COLUMNS, EDGE_COLUMNS) as writer,
+    ):
+        writer.write_element(ELEMENTS[0])
+        raise RuntimeError()
+
+    assert file_path.read_text() == "previous export"
+    assert [p.name for p in tmp_path.iterdir()] == [file_path.name]
+
+
+def test_table_writer_is_abstract(tmp_path):
+    with pytest.raises(TypeError):
+        TableWriter(tmp_path / "model.csv", ELEMENT_COLUMNS, EDGE_COLUMNS)
+
+
+@pytest.mark.parametrize("indent", [4, None])
+@pytest.mark.parametrize("rows", [[], [{"a": 1}], [{"a": [1, 2]}, {"b": "c"}]])
+def test_iter_json(rows, indent):
+    assert "".join(iter_json(iter(rows), indent)) == json.dumps(
+        rows, indent=indent, separators=None if indent else (",", ":")
+    )